@@ -0,0 +1,3 @@
+from .graph import ResourceGraph, Resource
+from .rules import Finding, RULES, run_rules
+from .report import build_report, capacity, format_text, format_json
@@ -0,0 +1,31 @@
+"""Analyze the synthesized stacks.
+
+Usage: python -m src.analyzer [cdktf.out] [--json] [--strict]
+"""
+
+import argparse
+import sys
+
+from .graph import ResourceGraph
+from .rules import run_rules
+from .report import build_report, format_json, format_text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.analyzer")
+    parser.add_argument("path", nargs="?", default="cdktf.out")
+    parser.add_argument("--json", action="store_true", help="JSON report")
+    parser.add_argument(
+        "--strict", action="store_true", help="exit with 1 if there are warnings"
+    )
+    args = parser.parse_args(argv)
+
+    graph = ResourceGraph.load(args.path)
+    report = build_report(graph, run_rules(graph))
+    print(format_json(report) if args.json else format_text(report))
+
+    return 1 if args.strict and report["warnings"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
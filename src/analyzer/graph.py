@@ -0,0 +1,192 @@
+import glob
+import json
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+# ${aws_lambda_function.lambda-get-data.arn} -> (aws_lambda_function, lambda-get-data)
+REFERENCE = re.compile(r"\$\{(aws_[a-z0-9_]+)\.([A-Za-z0-9_-]+)[.}]")
+# Cross-stack reference of a split app, an output of another stack
+# ${data.terraform_remote_state.<state>.outputs.<output>} -> (state, output)
+REMOTE_REFERENCE = re.compile(
+    r"\$\{data\.terraform_remote_state\.([A-Za-z0-9_-]+)\.outputs\.([A-Za-z0-9_-]+)[.}]"
+)
+
+
+@dataclass
+class Resource:
+    stack: str
+    type: str
+    name: str
+    config: dict
+    references: set = field(default_factory=set)
+    remote_references: set = field(default_factory=set)
+
+    @property
+    def address(self):
+        return f"{self.type}.{self.name}"
+
+    @property
+    def path(self):
+        """Construct path (stack/construct/resource) when cdktf recorded it."""
+        metadata = self.config.get("//", {}).get("metadata", {})
+        return metadata.get("path", f"{self.stack}/{self.address}")
+
+
+def _references(value, pattern=REFERENCE):
+    refs = set()
+    if isinstance(value, str):
+        refs.update(pattern.findall(value))
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key != "//":
+                refs |= _references(item, pattern)
+    elif isinstance(value, list):
+        for item in value:
+            refs |= _references(item, pattern)
+    return refs
+
+
+def _state(backend, config):
+    """Identity of a state file, the same for its stack and its readers."""
+    if backend == "local":
+        # Local states are terraform.<stack>.tfstate next to the stack
+        return ("local", os.path.basename(config.get("path", "")))
+    return (backend, config.get("bucket"), config.get("key"))
+
+
+class ResourceGraph:
+    """Resources of synthesized stacks, indexed by type and by references.
+
+    Resources are keyed by (stack, address) since two stacks can hold
+    resources with the same address. References to the outputs of another
+    stack (terraform_remote_state) are followed to the resources of that
+    stack, the ones that cannot be resolved are kept in `unresolved`.
+    """
+
+    def __init__(self):
+        self.resources = {}
+        self.by_type = defaultdict(list)
+        self.references = defaultdict(set)
+        self.referenced_by = defaultdict(set)
+        self.unresolved = []
+        # stack -> state, {output: value}, {remote state: state}
+        self.states = {}
+        self.outputs = {}
+        self.remote_states = {}
+
+    @classmethod
+    def load(cls, path="cdktf.out"):
+        """Load a cdktf.out directory, a stack directory or a cdk.tf.json file."""
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = sorted(
+                glob.glob(os.path.join(path, "stacks", "*", "cdk.tf.json"))
+                + glob.glob(os.path.join(path, "cdk.tf.json"))
+            )
+        if not files:
+            raise FileNotFoundError(f"No cdk.tf.json found under {path}")
+
+        graph = cls()
+        for file in files:
+            with open(file) as f:
+                graph.add_stack(os.path.basename(os.path.dirname(file)), json.load(f))
+        return graph
+
+    def add_stack(self, stack, document):
+        for type, resources in document.get("resource", {}).items():
+            for name, config in resources.items():
+                resource = Resource(
+                    stack,
+                    type,
+                    name,
+                    config,
+                    _references(config),
+                    _references(config, REMOTE_REFERENCE),
+                )
+                self.resources[(stack, resource.address)] = resource
+                self.by_type[type].append(resource)
+
+        backend = document.get("terraform", {}).get("backend") or {
+            "local": {"path": f"terraform.{stack}.tfstate"}
+        }
+        self.states[stack] = _state(*next(iter(backend.items())))
+        self.outputs[stack] = {
+            name: output.get("value")
+            for name, output in document.get("output", {}).items()
+        }
+        self.remote_states[stack] = {
+            name: _state(state.get("backend"), state.get("config", {}))
+            for name, state in document.get("data", {})
+            .get("terraform_remote_state", {})
+            .items()
+        }
+        self._link()
+
+    def _remote(self, stack, state, output):
+        """Keys of the resources behind an output of another stack."""
+        producers = [
+            producer
+            for producer, identity in self.states.items()
+            if identity == self.remote_states[stack].get(state)
+        ]
+        if not producers or output not in self.outputs[producers[0]]:
+            return None
+        producer = producers[0]
+        return {
+            (producer, f"{type}.{name}")
+            for type, name in _references(self.outputs[producer][output])
+        }
+
+    def _link(self):
+        # Stacks can be added in any order, link them again with each stack
+        self.references.clear()
+        self.referenced_by.clear()
+        self.unresolved = []
+        for key, resource in self.resources.items():
+            targets = {(resource.stack, f"{t}.{n}") for t, n in resource.references}
+            for state, output in sorted(resource.remote_references):
+                remote = self._remote(resource.stack, state, output)
+                if remote is None:
+                    self.unresolved.append((resource, f"{state}.outputs.{output}"))
+                else:
+                    targets |= remote
+            for target in targets:
+                if target in self.resources:
+                    self.references[key].add(target)
+                    self.referenced_by[target].add(key)
+
+    @property
+    def stacks(self):
+        return sorted({stack for stack, _ in self.resources})
+
+    def of_type(self, type):
+        return self.by_type.get(type, [])
+
+    def get(self, stack, address):
+        return self.resources.get((stack, address))
+
+    def targets(self, resource, type):
+        """Resources of `type` that `resource` references."""
+        return [
+            self.resources[key]
+            for key in sorted(self.references[(resource.stack, resource.address)])
+            if self.resources[key].type == type
+        ]
+
+    def sources(self, resource, type):
+        """Resources of `type` that reference `resource`."""
+        return [
+            self.resources[key]
+            for key in sorted(self.referenced_by[(resource.stack, resource.address)])
+            if self.resources[key].type == type
+        ]
+
+    def counts(self):
+        """{stack: {type: count}}"""
+        counts = defaultdict(lambda: defaultdict(int))
+        for (stack, _), resource in self.resources.items():
+            counts[stack][resource.type] += 1
+        return {stack: dict(types) for stack, types in counts.items()}
@@ -0,0 +1,134 @@
+import json
+from dataclasses import asdict
+
+from .rules import DEFAULT_MEMORY, WARNING
+
+SECONDS_PER_MONTH = 30 * 24 * 3600
+# Account defaults, raise them with a quota increase
+ACCOUNT_CONCURRENCY = 1000
+API_GATEWAY_RPS = 10000
+
+
+def capacity(graph):
+    """Estimated monthly request limits of the synthesized resources.
+
+    Upper bounds from configuration only: provisioned capacity for
+    DynamoDB (4 KB strongly consistent reads, 1 KB writes), usage plan or
+    account throttling for API Gateway and concurrency over timeout (worst
+    case duration) for lambdas.
+    """
+    limits = []
+
+    for table in graph.of_type("aws_dynamodb_table"):
+        config = table.config
+        if config.get("billing_mode", "PROVISIONED") == "PROVISIONED":
+            read = config.get("read_capacity", 0)
+            write = config.get("write_capacity", 0)
+            limits.append(
+                {
+                    "resource": table.path,
+                    "kind": "dynamodb",
+                    "reads_per_month": read * SECONDS_PER_MONTH,
+                    "writes_per_month": write * SECONDS_PER_MONTH,
+                }
+            )
+        else:
+            limits.append({"resource": table.path, "kind": "dynamodb-on-demand"})
+
+    for stage in graph.of_type("aws_api_gateway_stage"):
+        rate = API_GATEWAY_RPS
+        quota = None
+        for plan in graph.of_type("aws_api_gateway_usage_plan"):
+            if stage.stack != plan.stack:
+                continue
+            throttle = plan.config.get("throttle_settings") or {}
+            rate = min(rate, throttle.get("rate_limit", rate))
+            quota = (plan.config.get("quota_settings") or {}).get("limit", quota)
+        limits.append(
+            {
+                "resource": stage.path,
+                "kind": "api-gateway",
+                "requests_per_month": int(rate * SECONDS_PER_MONTH),
+                "quota": quota,
+            }
+        )
+
+    for function in graph.of_type("aws_lambda_function"):
+        config = function.config
+        concurrency = config.get("reserved_concurrent_executions", -1)
+        if not isinstance(concurrency, int) or concurrency < 0:
+            concurrency = ACCOUNT_CONCURRENCY
+        timeout = config.get("timeout", 3)
+        limits.append(
+            {
+                "resource": function.path,
+                "kind": "lambda",
+                "memory_size": config.get("memory_size", DEFAULT_MEMORY),
+                "concurrency": concurrency,
+                "requests_per_month_at_timeout": int(
+                    concurrency / timeout * SECONDS_PER_MONTH
+                ),
+            }
+        )
+
+    return limits
+
+
+def build_report(graph, findings):
+    return {
+        "stacks": graph.counts(),
+        "capacity": capacity(graph),
+        "findings": [asdict(finding) for finding in findings],
+        "warnings": sum(f.severity == WARNING for f in findings),
+    }
+
+
+def _human(number):
+    for unit in ("", "K", "M", "B"):
+        if abs(number) < 1000:
+            return f"{number:.0f}{unit}"
+        number /= 1000
+    return f"{number:.0f}T"
+
+
+def format_text(report):
+    lines = ["Resources"]
+    for stack, counts in sorted(report["stacks"].items()):
+        lines.append(f"  {stack}: {sum(counts.values())}")
+        for type, count in sorted(counts.items()):
+            lines.append(f"    {type}: {count}")
+
+    lines.append("")
+    lines.append("Estimated monthly limits")
+    for limit in report["capacity"]:
+        if limit["kind"] == "dynamodb":
+            value = (
+                f"{_human(limit['reads_per_month'])} reads, "
+                f"{_human(limit['writes_per_month'])} writes"
+            )
+        elif limit["kind"] == "dynamodb-on-demand":
+            value = "on demand"
+        elif limit["kind"] == "api-gateway":
+            value = f"{_human(limit['requests_per_month'])} requests"
+            if limit["quota"]:
+                value += f" (quota {_human(limit['quota'])})"
+        else:
+            value = (
+                f"{_human(limit['requests_per_month_at_timeout'])} requests at "
+                f"timeout, {limit['memory_size']} MB, concurrency "
+                f"{limit['concurrency']}"
+            )
+        lines.append(f"  {limit['resource']}: {value}")
+
+    lines.append("")
+    lines.append(f"Findings ({report['warnings']} warnings)")
+    for finding in report["findings"]:
+        lines.append(
+            f"  [{finding['severity']}] {finding['rule']} "
+            f"{finding['resource']}: {finding['message']}"
+        )
+    return "\n".join(lines)
+
+
+def format_json(report):
+    return json.dumps(report, indent=2)
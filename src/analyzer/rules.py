@@ -0,0 +1,204 @@
+import json
+from dataclasses import dataclass
+
+# Lambda default memory size in MB
+DEFAULT_MEMORY = 128
+# API Gateway integration timeout in seconds
+API_TIMEOUT = 29
+
+WARNING = "warning"
+INFO = "info"
+
+
+@dataclass
+class Finding:
+    rule: str
+    severity: str
+    resource: str
+    message: str
+
+
+def policy_documents(graph, function):
+    """Policy documents attached to the role of a lambda function."""
+    documents = []
+    for role in graph.targets(function, "aws_iam_role"):
+        for policy in graph.targets(role, "aws_iam_policy"):
+            try:
+                documents.append((policy, json.loads(policy.config.get("policy", ""))))
+            except ValueError:
+                continue
+    return documents
+
+
+def function_actions(graph, function):
+    actions = set()
+    for _, document in policy_documents(graph, function):
+        for statement in document.get("Statement", []):
+            action = statement.get("Action", [])
+            actions.update([action] if isinstance(action, str) else action)
+    return actions
+
+
+def hot_functions(graph):
+    """Lambdas serving requests: API integrations and stream consumers."""
+    hot = {}
+    for type in (
+        "aws_api_gateway_integration",
+        "aws_apigatewayv2_integration",
+        "aws_lambda_event_source_mapping",
+    ):
+        for resource in graph.of_type(type):
+            for function in graph.targets(resource, "aws_lambda_function"):
+                hot[(function.stack, function.address)] = type
+    return hot
+
+
+def _int(value, default):
+    return value if isinstance(value, int) else default
+
+
+def lambda_memory(graph):
+    hot = hot_functions(graph)
+    for function in graph.of_type("aws_lambda_function"):
+        memory = _int(function.config.get("memory_size"), DEFAULT_MEMORY)
+        if memory > DEFAULT_MEMORY:
+            continue
+
+        actions = function_actions(graph, function)
+        if any(a.startswith("timestream:Select") for a in actions):
+            yield Finding(
+                "lambda-small-memory-timestream",
+                WARNING,
+                function.path,
+                f"{memory} MB lambda runs Timestream queries, CPU and network "
+                "scale with memory: try 512 MB or more",
+            )
+        elif (function.stack, function.address) in hot:
+            yield Finding(
+                "lambda-small-memory-hot-path",
+                INFO,
+                function.path,
+                f"{memory} MB lambda on a request path, measure with more memory "
+                "(same cost if duration drops proportionally)",
+            )
+
+
+def lambda_api_timeout(graph):
+    hot = hot_functions(graph)
+    for function in graph.of_type("aws_lambda_function"):
+        timeout = _int(function.config.get("timeout"), 3)
+        key = (function.stack, function.address)
+        if hot.get(key) == "aws_api_gateway_integration" and timeout > API_TIMEOUT:
+            yield Finding(
+                "lambda-timeout-above-api",
+                WARNING,
+                function.path,
+                f"timeout {timeout}s but API Gateway gives up after {API_TIMEOUT}s",
+            )
+
+
+def dynamodb_capacity(graph):
+    hot_tables = set()
+    for key in hot_functions(graph):
+        function = graph.resources[key]
+        for policy, _ in policy_documents(graph, function):
+            for table in graph.targets(policy, "aws_dynamodb_table"):
+                hot_tables.add((table.stack, table.address))
+    for mapping in graph.of_type("aws_lambda_event_source_mapping"):
+        for table in graph.targets(mapping, "aws_dynamodb_table"):
+            hot_tables.add((table.stack, table.address))
+
+    for table in graph.of_type("aws_dynamodb_table"):
+        if table.config.get("billing_mode", "PROVISIONED") != "PROVISIONED":
+            continue
+        read = _int(table.config.get("read_capacity"), 0)
+        write = _int(table.config.get("write_capacity"), 0)
+        if min(read, write) > 1:
+            continue
+
+        hot = (table.stack, table.address) in hot_tables
+        yield Finding(
+            "dynamodb-low-capacity",
+            WARNING if hot else INFO,
+            table.path,
+            f"provisioned {read} RCU / {write} WCU"
+            + (" on a request path" if hot else "")
+            + ", requests above it are throttled: use PAY_PER_REQUEST or autoscaling",
+        )
+
+
+def event_source_batching(graph):
+    for mapping in graph.of_type("aws_lambda_event_source_mapping"):
+        missing = [
+            key
+            for key in ("batch_size", "maximum_batching_window_in_seconds")
+            if key not in mapping.config
+        ]
+        if missing:
+            yield Finding(
+                "event-source-default-batch",
+                WARNING if "batch_size" in missing else INFO,
+                mapping.path,
+                f"{', '.join(missing)} left to default: one invocation per few "
+                "records under load, set them for the expected throughput",
+            )
+
+
+def rest_stage_cache(graph):
+    for stage in graph.of_type("aws_api_gateway_stage"):
+        if stage.config.get("cache_cluster_enabled"):
+            continue
+        apis = graph.targets(stage, "aws_api_gateway_rest_api")
+        gets = [
+            method
+            for api in apis
+            for method in graph.sources(api, "aws_api_gateway_method")
+            if method.config.get("http_method") == "GET"
+        ]
+        if gets:
+            yield Finding(
+                "rest-stage-cache-off",
+                INFO,
+                stage.path,
+                f"caching disabled with {len(gets)} GET method(s), every read "
+                "invokes a lambda",
+            )
+
+
+def log_retention(graph):
+    for group in graph.of_type("aws_cloudwatch_log_group"):
+        if not group.config.get("retention_in_days"):
+            yield Finding(
+                "log-group-no-retention",
+                INFO,
+                group.path,
+                "logs are kept forever",
+            )
+
+
+def unresolved_references(graph):
+    for resource, reference in graph.unresolved:
+        yield Finding(
+            "unresolved-reference",
+            WARNING,
+            resource.path,
+            f"remote state output {reference} not found in the loaded stacks, "
+            "rules do not follow it: analyze the whole cdktf.out",
+        )
+
+
+RULES = [
+    lambda_memory,
+    lambda_api_timeout,
+    dynamodb_capacity,
+    event_source_batching,
+    rest_stage_cache,
+    log_retention,
+    unresolved_references,
+]
+
+
+def run_rules(graph, rules=RULES):
+    findings = [finding for rule in rules for finding in rule(graph)]
+    order = {WARNING: 0, INFO: 1}
+    return sorted(findings, key=lambda f: (order[f.severity], f.rule, f.resource))
@@ -1 +1 @@
-from .rest import RESTApi
+from .rest import RESTApi, BULK_MEDIA_TYPES
@@ -20,6 +20,20 @@ from cdktf_cdktf_provider_aws.lambda_function import LambdaFunction
 from cdktf_cdktf_provider_aws.lambda_permission import LambdaPermission
 from cdktf_cdktf_provider_aws.cloudwatch_log_group import CloudwatchLogGroup
 
+from src.lambdas import (
+    Warmer,
+    check_retention,
+    lambda_runtime,
+    logging_environement,
+    tuning_environement,
+)
+
+# Binary responses of helpers.responses (Arrow, MessagePack)
+BULK_MEDIA_TYPES = [
+    "application/vnd.apache.arrow.stream",
+    "application/msgpack",
+]
+
 
 class RESTApi(Construct):
     def __init__(
@@ -28,11 +42,20 @@ class RESTApi(Construct):
         id: str,
         endpoint_name: str,
         tags: dict,
+        tracing: bool = False,
+        minimum_compression_size: int = 1024,
+        binary_media_types: list = None,
+        log_retention: int = 30,
+        log_level: str = "INFO",
+        log_format: str = "TEXT",
     ):
 
         super().__init__(scope, id)
 
         self.tags = tags
+        self.tracing = tracing
+        self.log_retention = check_retention(log_retention)
+        self.logging_environement = logging_environement(log_level, log_format)
         self.integration = []
 
         rest_api = ApiGatewayRestApi(
@@ -41,6 +64,13 @@ class RESTApi(Construct):
             name=f'PROJECT-RestApi-{tags["project"]}-{tags["env"]}',
             api_key_source="HEADER",
             endpoint_configuration={"types": ["REGIONAL"]},
+            # A string since the AWS provider 5.x
+            minimum_compression_size=(
+                None
+                if minimum_compression_size is None
+                else str(minimum_compression_size)
+            ),
+            binary_media_types=binary_media_types,
             tags=tags,
         )
 
@@ -98,9 +128,16 @@ class RESTApi(Construct):
         environement: dict,
         timeout: int = 5,
         resource: str = "data",
+        warm_concurrency: int = 0,
+        warm_schedule: str = "rate(5 minutes)",
+        runtime: str = None,
+        optimize: bool = False,
     ):
 
         suffix = f"{http.lower()}-{resource}"
+        if self.tracing:
+            policies = policies + ["arn:aws:iam::aws:policy/AWSXRayDaemonWriteAccess"]
+
         role = IamRole(
             self,
             f"lambda-role-{suffix}",
@@ -121,7 +158,13 @@ class RESTApi(Construct):
                 chunk = file.read(1024)
                 h.update(chunk) """
 
-        environement.update({"REGION": "ap-southeast-2"})
+        environement.update(
+            {
+                "REGION": "ap-southeast-2",
+                **tuning_environement(optimize),
+                **self.logging_environement,
+            }
+        )
         function = LambdaFunction(
             self,
             f"lambda-{suffix}",
@@ -131,10 +174,11 @@ class RESTApi(Construct):
             # source_code_hash=h.hexdigest(),
             role=role.arn,
             handler=f"{filename.split('/')[-1].split('.')[0]}.handler",
-            runtime="python3.9",
+            runtime=lambda_runtime(self, runtime),
             memory_size=128,
             timeout=timeout,
             environment={"variables": environement},
+            tracing_config={"mode": "Active"} if self.tracing else None,
             tags={"api": self.api_id, **self.tags},
         )
 
@@ -142,7 +186,7 @@ class RESTApi(Construct):
             self,
             f"logs-{suffix}",
             name=f"/aws/lambda/{function.function_name}",
-            retention_in_days=30,
+            retention_in_days=self.log_retention,
             tags={"api": self.api_id, **self.tags},
         )
 
@@ -156,6 +200,18 @@ class RESTApi(Construct):
             source_arn="arn:aws:execute-api:ap-southeast-2:092201464628:*/*/*",
         )
 
+        if warm_concurrency:
+            Warmer(
+                self,
+                f"warmer-{suffix}",
+                function_name=function.function_name,
+                function_arn=function.arn,
+                role_name=role.name,
+                concurrency=warm_concurrency,
+                schedule_expression=warm_schedule,
+                tags={"api": self.api_id, **self.tags},
+            )
+
         if resource == "data":
             resource_id = self.data_resource_id
         elif resource == "pred":
@@ -188,6 +244,10 @@ class RESTApi(Construct):
         return function.arn
 
     def finalize(self):
+        # A deployment of an api without methods fails at apply time
+        if not self.integration:
+            raise ValueError("Add at least one endpoint before finalize")
+
         deployement = ApiGatewayDeployment(
             self,
             "rest-deploy",
@@ -204,6 +264,7 @@ class RESTApi(Construct):
             deployment_id=deployement.id,
             rest_api_id=self.api_id,
             stage_name="v1",
+            xray_tracing_enabled=self.tracing,
             tags=self.tags,
         )
 
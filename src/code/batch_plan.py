@@ -0,0 +1,65 @@
+"""Planner for the BatchPredictions state machine.
+
+Input (the state machine wraps the execution input in "request"):
+    {"devices": ["A0", "A1"], "start": 1670536702, "end": 1670623102,
+     "step": 60, "window": 3600}
+
+Writes one window per device and per `window` seconds to
+s3://PLAN_BUCKET/plans/<execution>.json, the Distributed Map reads them
+from there (state payloads are limited to 256 KB) and predicts each
+window with one worker invocation.
+"""
+
+import json
+import logging
+import os
+import uuid
+
+import boto3
+
+LOGGER = logging.getLogger()
+LOGGER.setLevel(logging.INFO)
+
+DEFAULT_STEP = 60
+DEFAULT_WINDOW = 3600
+BUCKET = os.environ.get("PLAN_BUCKET")
+
+s3 = boto3.client("s3", region_name=os.environ.get("REGION"))
+
+
+def plan_windows(devices, start, end, step=DEFAULT_STEP, window=DEFAULT_WINDOW):
+    if step <= 0 or window <= 0:
+        raise ValueError(f"step ({step}) and window ({window}) must be positive")
+    windows = []
+    for device in devices:
+        for window_start in range(start, end, window):
+            windows.append(
+                {
+                    "device": device,
+                    "start": window_start,
+                    "end": min(window_start + window, end),
+                    "step": step,
+                }
+            )
+    return windows
+
+
+def handler(event, context):
+    request = event.get("request", event)
+    windows = plan_windows(
+        request["devices"],
+        int(request["start"]),
+        int(request["end"]),
+        int(request.get("step", DEFAULT_STEP)),
+        int(request.get("window", DEFAULT_WINDOW)),
+    )
+
+    key = f"plans/{event.get('execution') or uuid.uuid4()}.json"
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=key,
+        Body=json.dumps(windows, separators=(",", ":")),
+        ContentType="application/json",
+    )
+    LOGGER.info(f"Planned {len(windows)} windows in s3://{BUCKET}/{key}")
+    return {"bucket": BUCKET, "key": key, "windows": len(windows)}
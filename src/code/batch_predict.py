@@ -0,0 +1,80 @@
+"""Worker for the BatchPredictions state machine.
+
+Predicts every `step` seconds of one device window. Timestamps are sent to
+the inference endpoint BATCH_SIZE at a time and results are bulk-written
+in the prediction table. Errors are raised so Step Functions retries the
+window. With tracing, each inference request and each DynamoDB call is a
+subsegment (package aws-xray-sdk with `make zip_lambdas VENDOR=...`).
+
+Environement:
+    INFERENCE_URL: Databricks serving endpoint invocation url
+    INFERENCE_TOKEN: Databricks token
+    PREDICTION_TABLE_NAME: DynamoDB table for the predictions
+    BATCH_SIZE: Timestamps per inference request
+"""
+
+import json
+import logging
+import os
+from decimal import Decimal
+
+import boto3
+
+from helpers import http
+from helpers.tracing import patch_clients, subsegment
+
+# Before creating the clients
+patch_clients()
+
+LOGGER = logging.getLogger()
+LOGGER.setLevel(logging.INFO)
+
+BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "100"))
+
+# Created once per container, reused by every invocation
+TABLE = boto3.resource("dynamodb", region_name=os.environ["REGION"]).Table(
+    os.environ["PREDICTION_TABLE_NAME"]
+)
+
+
+def predict(device, timestamps):
+    response = http.request(
+        "POST",
+        os.environ["INFERENCE_URL"],
+        headers={"Authorization": f"Bearer {os.environ['INFERENCE_TOKEN']}"},
+        body={
+            "dataframe_records": [
+                {"DeviceID": device, "Timestamp": t} for t in timestamps
+            ]
+        },
+    )
+    predictions = json.loads(response.data)["predictions"]
+    if len(predictions) != len(timestamps):
+        raise RuntimeError(
+            f"Expected {len(timestamps)} predictions, got {len(predictions)}"
+        )
+    return predictions
+
+
+def handler(event, context):
+    device = event["device"]
+    timestamps = list(range(event["start"], event["end"], event["step"]))
+
+    written = 0
+    with TABLE.batch_writer() as batch:
+        for i in range(0, len(timestamps), BATCH_SIZE):
+            chunk = timestamps[i : i + BATCH_SIZE]
+            with subsegment("databricks-inference", device=device):
+                predictions = predict(device, chunk)
+            for timestamp, prediction in zip(chunk, predictions):
+                batch.put_item(
+                    Item={
+                        "DeviceID": device,
+                        "Timestamp": timestamp,
+                        "Prediction": Decimal(str(prediction)),
+                    }
+                )
+            written += len(chunk)
+
+    LOGGER.info(f"Wrote {written} predictions for {device}")
+    return {"written": written}
@@ -0,0 +1,329 @@
+"""Scheduled export of the project tables to Parquet (AnalyticsExport).
+
+1. UNLOAD the previous day of each Timestream table, partitioned by dt.
+2. Convert the completed DynamoDB exports (DYNAMODB_JSON) to Parquet.
+3. Start a DynamoDB export of today, converted by the next run.
+4. Start the crawler so new tables, columns and partitions are cataloged.
+
+Invoke with {"day": "YYYY-MM-DD"} to unload another day of Timestream.
+"""
+
+import datetime
+import gzip
+import json
+import logging
+import os
+import tempfile
+from decimal import Decimal
+
+import boto3
+import pyarrow
+import pyarrow.parquet
+from boto3.dynamodb.types import DYNAMODB_CONTEXT, TypeDeserializer
+
+REGION = os.environ["REGION"]
+BUCKET = os.environ["EXPORT_BUCKET"]
+CRAWLER = os.environ["GLUE_CRAWLER_NAME"]
+TIMESTREAM_DATABASE = os.environ.get("TIMESTREAM_DATABASE_NAME")
+TIMESTREAM_TABLES = [t for t in os.environ.get("TIMESTREAM_TABLES", "").split(",") if t]
+DYNAMODB_TABLE_ARN = os.environ.get("DYNAMODB_TABLE_ARN")
+
+RAW_PREFIX = os.environ.get("DYNAMODB_RAW_PREFIX", "dynamodb-raw")
+
+# Items held in memory, written as one row group
+BATCH_SIZE = 50_000
+# Rows of a part file, bounds the local file in /tmp
+PART_ROWS = 1_000_000
+# Numbers of the DynamoDB exports, up to 38 digits
+NUMBER = pyarrow.decimal128(38, 9)
+# Kind of the numbers NUMBER cannot hold, written as strings
+LONG_NUMBER = "N+"
+
+LOGGER = logging.getLogger()
+LOGGER.setLevel(logging.INFO)
+
+s3 = boto3.client("s3", region_name=REGION)
+glue = boto3.client("glue", region_name=REGION)
+dynamodb = boto3.client("dynamodb", region_name=REGION)
+timestream = boto3.client("timestream-query", region_name=REGION)
+deserializer = TypeDeserializer()
+
+
+def unload_timestream(table: str, day: datetime.date):
+    start = day.isoformat()
+    end = (day + datetime.timedelta(days=1)).isoformat()
+    # The partition column must be the last one
+    query = (
+        f"UNLOAD (SELECT *, date_format(time, '%Y-%m-%d') AS dt "
+        f'FROM "{TIMESTREAM_DATABASE}"."{table}" '
+        f"WHERE time >= from_iso8601_date('{start}') "
+        f"AND time < from_iso8601_date('{end}')) "
+        f"TO 's3://{BUCKET}/timestream/{table}/' "
+        "WITH (format = 'PARQUET', compression = 'SNAPPY', "
+        "partitioned_by = ARRAY['dt'])"
+    )
+    response = timestream.query(QueryString=query)
+    while "NextToken" in response:
+        response = timestream.query(QueryString=query, NextToken=response["NextToken"])
+    LOGGER.info("Unloaded %s %s: %s", table, start, response["Rows"])
+
+
+def _plain(value):
+    """JSON encodable value, numbers without float rounding.
+
+    Integers stay integers, other numbers are floats when the float prints
+    back to the same number, else strings.
+    """
+    if isinstance(value, Decimal):
+        if value == value.to_integral_value():
+            return int(value)
+        number = float(value)
+        return number if Decimal(repr(number)) == value else str(value)
+    if isinstance(value, (set, list)):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def _exact(number: str) -> bool:
+    """Whether a DynamoDB number fits NUMBER without rounding."""
+    _, digits, exponent = Decimal(number).normalize(DYNAMODB_CONTEXT).as_tuple()
+    return -exponent <= NUMBER.scale and len(digits) + exponent <= (
+        NUMBER.precision - NUMBER.scale
+    )
+
+
+def _kinds(item: dict):
+    for name, value in item.items():
+        (kind,) = value
+        if kind == "N" and not _exact(value["N"]):
+            kind = LONG_NUMBER
+        yield name, kind
+
+
+def _lines(key: str):
+    body = s3.get_object(Bucket=BUCKET, Key=key)["Body"]
+    with gzip.GzipFile(fileobj=body) as lines:
+        for line in lines:
+            yield json.loads(line)["Item"]
+
+
+def _batches(keys: list):
+    """Items of the export data files, BATCH_SIZE at a time."""
+    batch = []
+    for key in keys:
+        for item in _lines(key):
+            batch.append(item)
+            if len(batch) == BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _schema(types: dict) -> pyarrow.Schema:
+    """Schema of the DynamoDB types seen so far.
+
+    Numbers are decimal128(38, 9), booleans bool, anything else (strings,
+    maps, lists, sets, binary, numbers NUMBER cannot hold or mixed types) a
+    string, JSON encoded unless it is a string.
+    """
+    fields = []
+    for name, kinds in sorted(types.items()):
+        kinds = kinds - {"NULL"}
+        if kinds == {"N"}:
+            fields.append(pyarrow.field(name, NUMBER))
+        elif kinds == {"BOOL"}:
+            fields.append(pyarrow.field(name, pyarrow.bool_()))
+        else:
+            fields.append(pyarrow.field(name, pyarrow.string()))
+    return pyarrow.schema(fields)
+
+
+def _row(item: dict, schema: pyarrow.Schema) -> dict:
+    row = {}
+    for name, value in item.items():
+        value = deserializer.deserialize(value)
+        if schema.field(name).type != pyarrow.string() or value is None:
+            row[name] = value
+        elif isinstance(value, str):
+            row[name] = value
+        elif isinstance(value, Decimal):
+            row[name] = str(value)
+        else:
+            row[name] = json.dumps(_plain(value), sort_keys=True)
+    return row
+
+
+class _Parts:
+    """Parquet part files of a partition.
+
+    A new part starts when the schema changes or after PART_ROWS rows.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.keys = []
+        self.schema = None
+        self.file = None
+        self.writer = None
+        self.rows = 0
+
+    def write(self, rows: list, schema: pyarrow.Schema):
+        if self.writer and schema != self.schema:
+            changed = [
+                field.name
+                for field in self.schema
+                if schema.field(field.name).type != field.type
+            ]
+            if changed:
+                LOGGER.warning(
+                    "Columns %s of %s changed type, its part files differ",
+                    ", ".join(changed),
+                    self.prefix,
+                )
+            self.close()
+        elif self.rows >= PART_ROWS:
+            self.close()
+        if not self.writer:
+            self.schema = schema
+            self.file = tempfile.NamedTemporaryFile(suffix=".parquet")
+            self.writer = pyarrow.parquet.ParquetWriter(
+                self.file.name, schema, compression="snappy"
+            )
+        self.writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+        self.rows += len(rows)
+
+    def close(self):
+        if not self.writer:
+            return
+        self.writer.close()
+        key = f"{self.prefix}part-{len(self.keys):05d}.parquet"
+        s3.upload_file(self.file.name, BUCKET, key)
+        self.keys.append(key)
+        self.file.close()
+        self.writer = None
+        self.rows = 0
+
+    def abort(self):
+        if self.writer:
+            self.writer.close()
+            self.file.close()
+            self.writer = None
+        for key in self.keys:
+            s3.delete_object(Bucket=BUCKET, Key=key)
+
+
+def convert_export(export: dict, table: str):
+    """Convert an export to Parquet in one pass, _SUCCESS when done.
+
+    DynamoDB has no schema and pyarrow would infer the types of each batch
+    on its own. The DynamoDB types of each attribute are merged with the
+    ones of the previous exports (kept in schemas/dynamodb/<table>.json) and
+    the ones of the batches read so far. The items are read once, BATCH_SIZE
+    at a time, and each batch is a row group of the current part file. A
+    batch widening the schema (new attribute or type) starts a new part
+    file. Exports whose raw files expired are skipped.
+    """
+    day = export["ExportTime"].date().isoformat()
+    prefix = f"dynamodb/{table}/dt={day}/"
+    done = s3.list_objects_v2(Bucket=BUCKET, Prefix=f"{prefix}_SUCCESS")
+    if done.get("KeyCount"):
+        return False
+
+    schema_key = f"schemas/dynamodb/{table}.json"
+    try:
+        previous = json.load(s3.get_object(Bucket=BUCKET, Key=schema_key)["Body"])
+    except s3.exceptions.NoSuchKey:
+        previous = {}
+    types = {name: set(kinds) for name, kinds in previous.items()}
+
+    parts = _Parts(prefix)
+    try:
+        manifest = s3.get_object(
+            Bucket=BUCKET,
+            Key=export["ExportManifest"].replace("manifest-summary", "manifest-files"),
+        )["Body"].read()
+        keys = [json.loads(line)["dataFileS3Key"] for line in manifest.splitlines()]
+        for batch in _batches(keys):
+            for item in batch:
+                for name, kind in _kinds(item):
+                    types.setdefault(name, set()).add(kind)
+            schema = _schema(types)
+            parts.write([_row(item, schema) for item in batch], schema)
+        parts.close()
+    except s3.exceptions.NoSuchKey:
+        parts.abort()
+        LOGGER.warning("Skipped export %s, its raw files expired", export["ExportArn"])
+        return False
+
+    for name, kinds in previous.items():
+        kinds = set(kinds) - {"NULL"}
+        if kinds in ({"N"}, {"BOOL"}) and types[name] - {"NULL"} != kinds:
+            LOGGER.warning(
+                "Column %s of %s is now a string, older partitions differ",
+                name,
+                table,
+            )
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=schema_key,
+        Body=json.dumps({name: sorted(kinds) for name, kinds in types.items()}),
+    )
+    s3.put_object(Bucket=BUCKET, Key=f"{prefix}_SUCCESS", Body=b"")
+    LOGGER.info("Converted export %s to %s", export["ExportArn"], prefix)
+    return True
+
+
+def export_dynamodb(today: datetime.date):
+    table = DYNAMODB_TABLE_ARN.split("/")[-1]
+
+    paginator_args = {"TableArn": DYNAMODB_TABLE_ARN}
+    while True:
+        page = dynamodb.list_exports(**paginator_args)
+        for summary in page.get("ExportSummaries", []):
+            if summary["ExportStatus"] != "COMPLETED":
+                continue
+            export = dynamodb.describe_export(ExportArn=summary["ExportArn"])[
+                "ExportDescription"
+            ]
+            if export["S3Bucket"] == BUCKET and export.get("S3Prefix", "").startswith(
+                f"{RAW_PREFIX}/{table}"
+            ):
+                convert_export(export, table)
+        if "NextToken" not in page:
+            break
+        paginator_args["NextToken"] = page["NextToken"]
+
+    # Same token on the same day: retries do not start a second export
+    dynamodb.export_table_to_point_in_time(
+        TableArn=DYNAMODB_TABLE_ARN,
+        S3Bucket=BUCKET,
+        S3Prefix=f"{RAW_PREFIX}/{table}",
+        ExportFormat="DYNAMODB_JSON",
+        ClientToken=f"{table}-{today.isoformat()}",
+    )
+
+
+def handler(event, context):
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    if event.get("day"):
+        day = datetime.date.fromisoformat(event["day"])
+    else:
+        day = today - datetime.timedelta(days=1)
+
+    for table in TIMESTREAM_TABLES:
+        unload_timestream(table, day)
+
+    if DYNAMODB_TABLE_ARN:
+        export_dynamodb(today)
+
+    try:
+        glue.start_crawler(Name=CRAWLER)
+    except glue.exceptions.CrawlerRunningException:
+        pass
+
+    return {"day": day.isoformat()}
@@ -0,0 +1,128 @@
+"""Websocket connection table helpers (DynamoWebsocket).
+
+Connections carry an `expiresAt` (epoch seconds) refreshed by every
+heartbeat, DynamoDB TTL removes them CONNECTION_TTL seconds after the last
+one. TTL deletion can lag, so readers also filter expired rows.
+
+manage_conn.py registers connections on $connect and refreshes them on
+heartbeat, sweep_conn.py deletes the expired and gone ones.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.dynamodb.conditions import Attr
+
+CONNECTION_TTL = int(os.environ.get("CONNECTION_TTL", "3600"))
+# get_connection calls of the sweeper at the same time
+SWEEP_WORKERS = int(os.environ.get("SWEEP_WORKERS", "16"))
+# Rows read by the sweeper between two deadline checks
+SWEEP_PAGE_SIZE = 500
+
+
+def expires_at(ttl=None):
+    return int(time.time()) + (CONNECTION_TTL if ttl is None else ttl)
+
+
+def register(table, connection_id, ttl=None):
+    table.put_item(Item={"connectionId": connection_id, "expiresAt": expires_at(ttl)})
+
+
+def heartbeat(table, connection_id, ttl=None):
+    """Refresh the expiry of a connection, False if it is unknown."""
+    try:
+        table.update_item(
+            Key={"connectionId": connection_id},
+            UpdateExpression="SET expiresAt = :e",
+            ConditionExpression=Attr("connectionId").exists(),
+            ExpressionAttributeValues={":e": expires_at(ttl)},
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def _scan(table, **kwargs):
+    kwargs.setdefault("ProjectionExpression", "connectionId")
+    while True:
+        response = table.scan(**kwargs)
+        yield from (item["connectionId"] for item in response["Items"])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def live_connections(table):
+    """Ids of connections not expired (rows without expiresAt are kept)."""
+    now = int(time.time())
+    return list(
+        _scan(
+            table,
+            FilterExpression=Attr("expiresAt").not_exists() | Attr("expiresAt").gt(now),
+        )
+    )
+
+
+def delete(table, connection_ids):
+    with table.batch_writer() as batch:
+        for connection_id in connection_ids:
+            batch.delete_item(Key={"connectionId": connection_id})
+
+
+def broadcast(api, table, data):
+    """Post data to every live connection and delete the gone ones.
+
+    Returns the number of connections reached.
+    """
+    gone = []
+    reached = 0
+    for connection_id in live_connections(table):
+        try:
+            api.post_to_connection(ConnectionId=connection_id, Data=data)
+            reached += 1
+        except api.exceptions.GoneException:
+            gone.append(connection_id)
+    delete(table, gone)
+    return reached
+
+
+def sweep(api, table, deadline=None, page_size=SWEEP_PAGE_SIZE):
+    """Delete expired connections and the ones API Gateway no longer knows.
+
+    The table is read page_size rows at a time, the connections of a page
+    are checked with SWEEP_WORKERS threads and the stale ones deleted before
+    the next page. With a deadline (time.monotonic()) it stops after the
+    page that reaches it, the next run starts over: expired rows left
+    behind are removed by TTL anyway.
+
+    Returns the number of deleted connections.
+    """
+    now = int(time.time())
+
+    def gone(connection_id):
+        try:
+            api.get_connection(ConnectionId=connection_id)
+        except api.exceptions.GoneException:
+            return True
+        return False
+
+    deleted = 0
+    kwargs = {"ProjectionExpression": "connectionId, expiresAt", "Limit": page_size}
+    with ThreadPoolExecutor(SWEEP_WORKERS) as pool:
+        while True:
+            response = table.scan(**kwargs)
+            stale, live = [], []
+            for item in response["Items"]:
+                expired = item.get("expiresAt", now + 1) <= now
+                (stale if expired else live).append(item["connectionId"])
+            stale += [c for c, g in zip(live, pool.map(gone, live)) if g]
+            delete(table, stale)
+            deleted += len(stale)
+
+            if "LastEvaluatedKey" not in response:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return deleted
@@ -0,0 +1,242 @@
+"""Structured, buffered logging for lambda handlers.
+
+The constructs set LOG_LEVEL and LOG_FORMAT (JSON or TEXT) on every
+function. setup() puts a buffer in front of the handler of the runtime,
+records are written at the end of the invocation, at the first warning
+or error, and when the invocation is about to time out
+(LOG_FLUSH_MARGIN_MS before its deadline), so logging does not add a
+write per line to the request. TEXT records are handed to the runtime
+handler, one log event per record with its traceback, JSON records are
+written in a single write, one line per record.
+
+- Debug sampling: LOG_DEBUG_SAMPLE_RATE of the invocations (0.0 to 1.0)
+  log at DEBUG, with all their context, the others at LOG_LEVEL.
+- Error rate limiting: the same error (logger, message, exception type)
+  is logged at most LOG_ERROR_LIMIT times per minute per container, the
+  next allowed one reports how many were suppressed.
+- JSON lines carry the request id, extra fields and the traceback in one
+  log event instead of one event per traceback line.
+
+Example:
+    from helpers import logs
+
+    LOGGER = logs.setup()
+
+    @logs.logged
+    def handler(event, context):
+        LOGGER.info("Fetched", extra={"device": "A0", "records": 12})
+        LOGGER.debug("Raw response %s", response)
+"""
+
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import random
+import sys
+import threading
+import time
+
+LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+FORMAT = os.environ.get("LOG_FORMAT", "TEXT").upper()
+DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0"))
+ERROR_LIMIT = int(os.environ.get("LOG_ERROR_LIMIT", "10"))
+BUFFER_SIZE = int(os.environ.get("LOG_BUFFER_SIZE", "100"))
+FLUSH_MARGIN_MS = int(os.environ.get("LOG_FLUSH_MARGIN_MS", "500"))
+
+# LogRecord attributes, everything else comes from `extra`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_request_id = None
+_buffer = None
+_level = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, extra fields included."""
+
+    def format(self, record):
+        entry = {
+            "timestamp": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if _request_id:
+            entry["requestId"] = _request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("[%(levelname)s] %(asctime)s %(name)s %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, "suppressed", None):
+            text = f"{text} ({record.suppressed} similar errors suppressed)"
+        return f"{_request_id} {text}" if _request_id else text
+
+
+class ErrorRateLimit(logging.Filter):
+    """Let at most `limit` identical errors through per `period` seconds."""
+
+    def __init__(self, limit=ERROR_LIMIT, period=60.0):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        self.windows = {}
+
+    def filter(self, record):
+        if record.levelno < logging.ERROR or self.limit <= 0:
+            return True
+
+        exc_type = record.exc_info[0].__name__ if record.exc_info else None
+        key = (record.name, record.msg, exc_type)
+        now = time.monotonic()
+        start, count, suppressed = self.windows.get(key, (now, 0, 0))
+        if now - start >= self.period:
+            start, count = now, 0
+
+        if count >= self.limit:
+            self.windows[key] = (start, count, suppressed + 1)
+            return False
+
+        self.windows[key] = (start, count + 1, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class BufferedHandler(logging.handlers.MemoryHandler):
+    """Keep records in memory until flush, WARNING and above flush at once.
+
+    With a target (the handler of the runtime) the records are handed to
+    it, otherwise they are formatted and written to stream in one write.
+    Once `immediate` is set every record is written straight away.
+    """
+
+    def __init__(self, formatter=None, capacity=BUFFER_SIZE, stream=None, target=None):
+        super().__init__(capacity, flushLevel=logging.WARNING, target=target)
+        self.stream = stream or sys.stdout
+        self.immediate = False
+        if formatter is not None:
+            self.setFormatter(formatter)
+
+    def shouldFlush(self, record):
+        return self.immediate or super().shouldFlush(record)
+
+    def flush(self):
+        if self.target is not None:
+            super().flush()
+            return
+
+        self.acquire()
+        try:
+            if self.buffer:
+                lines = []
+                for record in self.buffer:
+                    try:
+                        lines.append(self.format(record))
+                    except Exception:
+                        self.handleError(record)
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+                self.buffer.clear()
+        finally:
+            self.release()
+
+
+def setup(level: str = None, fmt: str = None):
+    """Configure the root logger once per container, return it.
+
+    level and fmt default to LOG_LEVEL and LOG_FORMAT.
+    """
+    global _buffer, _level
+
+    root = logging.getLogger()
+    if _buffer is None:
+        runtime_handlers = list(root.handlers)
+        for handler in runtime_handlers:
+            root.removeHandler(handler)
+
+        if (fmt or FORMAT) == "JSON":
+            _buffer = BufferedHandler(JsonFormatter())
+        else:
+            # The runtime handler keeps a multi-line record in one log event
+            target = (
+                runtime_handlers[0]
+                if runtime_handlers
+                else logging.StreamHandler(sys.stdout)
+            )
+            target.setFormatter(TextFormatter())
+            _buffer = BufferedHandler(target=target)
+        _buffer.addFilter(ErrorRateLimit())
+        root.addHandler(_buffer)
+        # Records are dropped by level before being formatted or buffered
+        logging.getLogger("botocore").setLevel(logging.WARNING)
+        logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+    if level or _level is None:
+        _level = (level or LEVEL).upper()
+        root.setLevel(_level)
+    return root
+
+
+def flush():
+    """Write the buffered records, call before returning from the handler."""
+    if _buffer is not None:
+        _buffer.flush()
+
+
+def _flush_late():
+    """Write the buffer and every next record, the invocation times out."""
+    _buffer.immediate = True
+    _buffer.flush()
+
+
+def logged(handler):
+    """Decorator: request id, debug sampling, error logging and flush.
+
+    The buffer is also flushed LOG_FLUSH_MARGIN_MS before the deadline of
+    the invocation, so a timeout does not lose its logs.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _request_id
+
+        root = setup()
+        _request_id = getattr(context, "aws_request_id", None)
+        sampled = DEBUG_SAMPLE_RATE and random.random() < DEBUG_SAMPLE_RATE
+        if sampled:
+            root.setLevel(logging.DEBUG)
+
+        _buffer.immediate = False
+        timer = None
+        remaining = getattr(context, "get_remaining_time_in_millis", None)
+        if remaining is not None:
+            delay = max(0, remaining() - FLUSH_MARGIN_MS) / 1000
+            timer = threading.Timer(delay, _flush_late)
+            timer.daemon = True
+            timer.start()
+        try:
+            return handler(event, context)
+        except Exception:
+            root.exception("Unhandled error")
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if sampled:
+                root.setLevel(_level)
+            flush()
+            _request_id = None
+
+    return wrapper
@@ -0,0 +1,107 @@
+"""Streaming reads of the Parquet exports of AnalyticsExport.
+
+Files are read one row group at a time and only the requested columns are
+fetched from S3, so a lambda can scan months of exports in little memory.
+Partitions are selected from the dt=YYYY-MM-DD folder of each file before
+anything is downloaded. Needs pyarrow (AWS SDK for pandas layer).
+
+Example:
+    from helpers.parquet import iter_row_groups
+
+    def handler(event, context):
+        total = 0
+        for batch in iter_row_groups(
+            "timestream/sensors/", columns=["DeviceID", "temperature"],
+            start="2024-01-01", end="2024-01-31",
+        ):
+            total += pyarrow.compute.sum(batch["temperature"]).as_py() or 0
+        return {"total": total}
+"""
+
+import os
+import re
+
+import boto3
+
+try:
+    import pyarrow
+    import pyarrow.fs
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+REGION = os.environ.get("REGION", "ap-southeast-2")
+BUCKET = os.environ.get("EXPORT_BUCKET")
+
+PARTITION = re.compile(r"/dt=(\d{4}-\d{2}-\d{2})/")
+
+_s3 = None
+_filesystem = None
+
+
+def list_files(prefix: str, start: str = None, end: str = None, bucket: str = None):
+    """[(key, dt)] of the Parquet files under prefix with start <= dt <= end."""
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client("s3", region_name=REGION)
+
+    files = []
+    paginator = _s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket or BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            match = PARTITION.search(key)
+            if not match or key.endswith((".json", "_SUCCESS")):
+                continue
+            dt = match.group(1)
+            if (start and dt < start) or (end and dt > end):
+                continue
+            files.append((key, dt))
+    return sorted(files, key=lambda file: (file[1], file[0]))
+
+
+def iter_row_groups(
+    prefix: str,
+    columns: list = None,
+    start: str = None,
+    end: str = None,
+    bucket: str = None,
+):
+    """Yield one pyarrow.Table per row group of the files under prefix.
+
+    columns prunes the columns read from S3, "dt" is the partition of the
+    file and is added as a column when requested (or when columns is None).
+    """
+    if pyarrow is None:
+        raise ImportError("pyarrow is required to read Parquet exports")
+
+    global _filesystem
+    if _filesystem is None:
+        _filesystem = pyarrow.fs.S3FileSystem(region=REGION)
+
+    bucket = bucket or BUCKET
+    with_dt = columns is None or "dt" in columns
+    file_columns = None if columns is None else [c for c in columns if c != "dt"]
+
+    for key, dt in list_files(prefix, start, end, bucket):
+        with _filesystem.open_input_file(f"{bucket}/{key}") as file:
+            parquet = pyarrow.parquet.ParquetFile(file)
+            for group in range(parquet.num_row_groups):
+                table = parquet.read_row_group(group, columns=file_columns)
+                if with_dt:
+                    table = table.append_column(
+                        "dt", pyarrow.array([dt] * table.num_rows, pyarrow.string())
+                    )
+                yield table
+
+
+def iter_rows(
+    prefix: str,
+    columns: list = None,
+    start: str = None,
+    end: str = None,
+    bucket: str = None,
+):
+    """Yield rows as dicts, one row group in memory at a time."""
+    for table in iter_row_groups(prefix, columns, start, end, bucket):
+        yield from table.to_pylist()
@@ -0,0 +1,200 @@
+"""Bounded reads on the project DynamoDB table (DeviceID, Timestamp).
+
+Every query returns at most `limit` items and an opaque cursor to get the
+next page, so response time does not grow with the requested range.
+
+Example:
+    from helpers.reads import query_page, query_devices
+
+    def handler(event, context):
+        query = event["queryStringParameters"]
+        items, cursor = query_page(
+            TABLE,
+            query["DeviceID"],
+            int(query["start"]),
+            int(query["end"]),
+            cursor=query.get("cursor"),
+        )
+        return {"statusCode": 200, "body": json.dumps({"items": items, "cursor": cursor})}
+"""
+
+import base64
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+HASH_KEY = "DeviceID"
+RANGE_KEY = "Timestamp"
+DEFAULT_LIMIT = int(os.environ.get("READ_LIMIT", "1000"))
+# BatchGetItem limit
+MAX_BATCH_GET = 100
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class CursorError(ValueError):
+    """Invalid cursor, answer with a 400."""
+
+
+def encode_cursor(last_key):
+    """Opaque cursor of a LastEvaluatedKey, None when there is no next page."""
+    if not last_key:
+        return None
+    typed = {k: _serializer.serialize(v) for k, v in last_key.items()}
+    return base64.urlsafe_b64encode(json.dumps(typed).encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        typed = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        key = {k: _deserializer.deserialize(v) for k, v in typed.items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        raise CursorError(f"Invalid cursor: {e}")
+    if set(key) != {HASH_KEY, RANGE_KEY}:
+        raise CursorError("Invalid cursor: unexpected key")
+    return key
+
+
+def _projection(attributes):
+    """ProjectionExpression with placeholders, Timestamp is a reserved word."""
+    if not attributes:
+        return {}
+    names = {f"#p{i}": name for i, name in enumerate(attributes)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def query_page(
+    table,
+    device_id,
+    start,
+    end,
+    limit=DEFAULT_LIMIT,
+    cursor=None,
+    attributes=None,
+    descending=False,
+):
+    """One page of a device between start and end (inclusive).
+
+    Returns (items, next cursor or None). attributes restricts the returned
+    attributes (less read bandwidth, same read capacity).
+    """
+    kwargs = {
+        "TableName": table.name,
+        "KeyConditionExpression": Key(HASH_KEY).eq(device_id)
+        & Key(RANGE_KEY).between(start, end),
+        "Limit": limit,
+        "ScanIndexForward": not descending,
+        **_projection(attributes),
+    }
+    start_key = decode_cursor(cursor)
+    if start_key:
+        if start_key[HASH_KEY] != device_id:
+            raise CursorError("Invalid cursor: other device")
+        kwargs["ExclusiveStartKey"] = start_key
+
+    # The client of the resource is thread safe and keeps its type conversion
+    response = table.meta.client.query(**kwargs)
+    return response["Items"], encode_cursor(response.get("LastEvaluatedKey"))
+
+
+# State of a complete device in a query_devices cursor
+DONE = "done"
+
+
+def _encode_devices_cursor(states):
+    """Opaque cursor of {device: query_page cursor or DONE}, None when all done."""
+    if all(state == DONE for state in states.values()):
+        return None
+    return base64.urlsafe_b64encode(json.dumps(states).encode()).decode()
+
+
+def _decode_devices_cursor(cursor, device_ids):
+    try:
+        states = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise CursorError(f"Invalid cursor: {e}")
+    if not isinstance(states, dict) or set(states) != set(device_ids):
+        raise CursorError("Invalid cursor: other devices")
+    for device_id, state in states.items():
+        if state == DONE:
+            continue
+        key = decode_cursor(state) if isinstance(state, str) else None
+        if not key or key[HASH_KEY] != device_id:
+            raise CursorError(f"Invalid cursor: bad state of {device_id}")
+    return states
+
+
+def query_devices(
+    table,
+    device_ids,
+    start,
+    end,
+    limit=DEFAULT_LIMIT,
+    cursor=None,
+    attributes=None,
+    max_workers=8,
+):
+    """query_page of several devices in parallel.
+
+    cursor comes from a previous call on the same devices and records, for
+    every device, where it stopped or that it is done: complete devices
+    are skipped. A cursor of other devices raises CursorError. Returns
+    ({device: items}, next cursor or None when every device is done).
+    """
+    device_ids = list(dict.fromkeys(device_ids))
+    if cursor:
+        states = _decode_devices_cursor(cursor, device_ids)
+    else:
+        states = dict.fromkeys(device_ids)
+    pending = [d for d in device_ids if states[d] != DONE]
+
+    def query(device_id):
+        return query_page(
+            table, device_id, start, end, limit, states[device_id], attributes
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as e:
+        pages = list(e.map(query, pending))
+
+    items = {}
+    for device_id, (device_items, next_cursor) in zip(pending, pages):
+        items[device_id] = device_items
+        states[device_id] = next_cursor or DONE
+    return items, _encode_devices_cursor(states)
+
+
+def batch_get(table, keys, attributes=None, retries=5):
+    """Items of (DeviceID, Timestamp) point lookups, 100 keys per request.
+
+    Unprocessed keys are retried with backoff. Missing items are omitted,
+    the order of keys is not kept.
+    """
+    client = table.meta.client
+    keys = [{HASH_KEY: device, RANGE_KEY: timestamp} for device, timestamp in keys]
+    items = []
+    for i in range(0, len(keys), MAX_BATCH_GET):
+        request = {
+            table.name: {"Keys": keys[i : i + MAX_BATCH_GET], **_projection(attributes)}
+        }
+        for attempt in range(retries + 1):
+            response = client.batch_get_item(RequestItems=request)
+            items.extend(response["Responses"].get(table.name, []))
+            request = response.get("UnprocessedKeys")
+            if not request:
+                break
+            if attempt == retries:
+                raise RuntimeError(
+                    f"{len(request[table.name]['Keys'])} keys unprocessed"
+                )
+            time.sleep(min(1, 0.05 * 2**attempt))
+    return items
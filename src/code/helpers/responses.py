@@ -0,0 +1,107 @@
+"""Response encoding for bulk read endpoints.
+
+The format is negotiated with the Accept header:
+
+    application/vnd.apache.arrow.stream  Arrow IPC stream (pyarrow packaged)
+    application/msgpack                  MessagePack (msgpack packaged)
+    anything else                        JSON
+
+JSON is a list of objects, or one array per column with `?format=columnar`
+(or `Accept: application/json; format=columnar`). Decimals from boto3 are
+encoded as numbers, not strings. Binary formats need the api to be created
+with `binary_media_types=BULK_MEDIA_TYPES`.
+
+JSON is compressed by API Gateway (`minimum_compression_size`) for clients
+sending `Accept-Encoding: gzip`. It compresses after the 6 MB limit of a
+proxy response: use columnar JSON, a binary format or pagination for
+bigger results.
+
+Example:
+    from helpers.responses import encode_response
+
+    def handler(event, context):
+        items = table.query(...)["Items"]
+        return encode_response(event, items)
+"""
+
+import base64
+import json
+from decimal import Decimal
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+JSON = "application/json"
+
+
+def _number(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {k: _number(v) for k, v in value.items()}
+    if isinstance(value, (list, set, tuple)):
+        return [_number(v) for v in value]
+    return value
+
+
+def to_columns(items):
+    """[{a: 1, b: 2}, {a: 3}] -> {a: [1, 3], b: [2, None]}"""
+    names = []
+    for item in items:
+        for name in item:
+            if name not in names:
+                names.append(name)
+    return {name: [_number(item.get(name)) for item in items] for name in names}
+
+
+def _accepted(event):
+    headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+    accept = [part.strip().lower() for part in headers.get("accept", "").split(",")]
+    query = event.get("queryStringParameters") or {}
+    columnar = query.get("format") == "columnar" or any(
+        "format=columnar" in part for part in accept
+    )
+    return [part.split(";")[0].strip() for part in accept], columnar
+
+
+def _binary(status, content_type, body, headers):
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": content_type, **headers},
+        "body": base64.b64encode(body).decode(),
+        "isBase64Encoded": True,
+    }
+
+
+def encode_response(event, items, status=200, headers=None):
+    """API Gateway proxy response of items in the format the client accepts."""
+    headers = {"Vary": "Accept", **(headers or {})}
+    accept, columnar = _accepted(event)
+
+    if ARROW in accept and pyarrow is not None:
+        table = pyarrow.Table.from_pydict(to_columns(items))
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return _binary(status, ARROW, sink.getvalue().to_pybytes(), headers)
+
+    data = to_columns(items) if columnar else _number(items)
+
+    if MSGPACK in accept and msgpack is not None:
+        return _binary(status, MSGPACK, msgpack.packb(data), headers)
+
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": JSON, **headers},
+        "body": json.dumps(data, separators=(",", ":")),
+    }
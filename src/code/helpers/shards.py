@@ -0,0 +1,95 @@
+"""Sharding and checkpoints for ScheduledLambdas(shards=N, checkpoint=True).
+
+Every shard receives {"shard": i, "shards": N} and only handles the devices
+hashed to it. Checkpoints record the last fetched timestamp per device so
+the next run only requests the delta.
+
+Example:
+    from helpers.shards import Checkpoints, shard_devices
+
+    CHECKPOINTS = Checkpoints()
+
+    def handler(event, context):
+        devices = shard_devices(list_devices(), event)
+        since = CHECKPOINTS.load(devices)
+        latest = {}
+        for device in devices:
+            records = fetch(device, start=since.get(device, 0))
+            if records:
+                write(records)
+                latest[device] = max(r["Timestamp"] for r in records)
+        CHECKPOINTS.save(latest)
+"""
+
+import os
+import time
+import zlib
+
+import boto3
+
+# BatchGetItem limit
+MAX_BATCH_GET = 100
+# Seconds before the first retry of unprocessed keys, doubled on each one
+BACKOFF = 0.05
+MAX_BACKOFF = 1
+
+
+def shard_of(key, shards):
+    """Stable shard index of a key (same result in every container)."""
+    return zlib.crc32(str(key).encode()) % shards
+
+
+def shard_devices(devices, event):
+    """Devices handled by the shard in the scheduled event."""
+    shards = int(event.get("shards", 1))
+    if shards <= 1:
+        return list(devices)
+
+    shard = int(event["shard"])
+    return [device for device in devices if shard_of(device, shards) == shard]
+
+
+class Checkpoints:
+    def __init__(self, table_name=None, region_name=None):
+        self.table_name = table_name or os.environ["CHECKPOINT_TABLE_NAME"]
+        self.dynamodb = boto3.resource(
+            "dynamodb", region_name=region_name or os.environ.get("REGION")
+        )
+        self.table = self.dynamodb.Table(self.table_name)
+
+    def load(self, devices, retries=5):
+        """Last checkpointed timestamp per device, missing devices are omitted.
+
+        Unprocessed keys are retried with exponential backoff, capped at
+        MAX_BACKOFF seconds.
+        """
+        devices = list(devices)
+        checkpoints = {}
+        for i in range(0, len(devices), MAX_BATCH_GET):
+            request = {
+                self.table_name: {
+                    "Keys": [{"DeviceID": d} for d in devices[i : i + MAX_BATCH_GET]],
+                    "ProjectionExpression": "DeviceID, LastTimestamp",
+                }
+            }
+            for attempt in range(retries + 1):
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response["Responses"].get(self.table_name, []):
+                    checkpoints[item["DeviceID"]] = int(item["LastTimestamp"])
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+                if attempt == retries:
+                    raise RuntimeError(
+                        f"{len(request[self.table_name]['Keys'])} keys unprocessed"
+                    )
+                time.sleep(min(MAX_BACKOFF, BACKOFF * 2**attempt))
+        return checkpoints
+
+    def save(self, checkpoints):
+        """Record {device: last timestamp} after the data has been written."""
+        with self.table.batch_writer(overwrite_by_pkeys=["DeviceID"]) as batch:
+            for device, timestamp in checkpoints.items():
+                batch.put_item(
+                    Item={"DeviceID": device, "LastTimestamp": int(timestamp)}
+                )
@@ -0,0 +1,54 @@
+"""X-Ray helpers for lambda handlers.
+
+Tracing is only recorded when the function is deployed with `tracing=True`
+(Lambda then sets `_X_AMZN_TRACE_ID`) and `aws_xray_sdk` is packaged with
+the function (`make zip_lambdas VENDOR="aws-xray-sdk wrapt"`). Otherwise
+every helper here is a no-op, so handlers can use them unconditionally.
+"""
+
+import contextlib
+import os
+
+try:
+    from aws_xray_sdk.core import patch, xray_recorder
+except ImportError:
+    patch = None
+    xray_recorder = None
+
+_PATCHED = False
+
+
+def enabled():
+    """True if the current invocation is traced."""
+    return xray_recorder is not None and "_X_AMZN_TRACE_ID" in os.environ
+
+
+def patch_clients():
+    """Record a subsegment for every boto3 and urllib3 call.
+
+    Call once at module level, before creating clients. urllib3 is traced
+    through the httplib patch it is built on.
+    """
+    global _PATCHED
+    if _PATCHED or patch is None:
+        return
+    patch(["botocore", "httplib"])
+    _PATCHED = True
+
+
+@contextlib.contextmanager
+def subsegment(name, **annotations):
+    """Time a block of handler code as its own subsegment.
+
+    Example:
+        with subsegment("databricks-inference", device=device_id):
+            response = http.request("POST", url, body=payload)
+    """
+    if not enabled():
+        yield None
+        return
+
+    with xray_recorder.in_subsegment(name) as sub:
+        for key, value in annotations.items():
+            sub.put_annotation(key, value)
+        yield sub
@@ -0,0 +1,145 @@
+"""Warm-up events of Warmer (warm_concurrency on InvokableLambdas and
+RESTApi.add_endpoint).
+
+The rule sends {"warmer": true, "concurrency": N}. The container receiving
+it invokes the function N - 1 more times concurrently, each copy holding
+its container for WARMUP_DELAY so that N different containers answer.
+Decorate the handler with skip_warmup, or call is_warmup first thing in
+it, so no client or table is used on warm-up events.
+
+Warming N containers is best effort: Lambda may route a copy to a
+container that already finished its own copy. Raise WARMUP_DELAY (env, in
+seconds) if the logged number of distinct containers stays below N.
+
+
+Example:
+    from helpers.warmup import skip_warmup
+
+    @skip_warmup
+    def handler(event, context):
+        ...
+"""
+
+import functools
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Seconds a warm-up invocation holds its container, long enough for the
+# fan-out to reach the other containers
+WARMUP_DELAY = float(os.environ.get("WARMUP_DELAY", 0.1))
+
+# Tells the containers answering a fan-out apart
+CONTAINER = uuid.uuid4().hex
+
+_cold = True
+
+
+def _invoke(client, function_arn, payload):
+    response = client.invoke(
+        FunctionName=function_arn,
+        InvocationType="RequestResponse",
+        Payload=json.dumps(payload).encode(),
+    )
+    if "FunctionError" in response:
+        return None
+    return json.loads(response["Payload"].read())
+
+
+def _fan_out(context, concurrency):
+    """Invoke concurrency - 1 copies.
+
+    Returns how many were cold and the ids of the containers answering.
+    """
+    # Only the container fanning out needs a client
+    import boto3
+    from botocore.config import Config
+
+    client = boto3.client(
+        "lambda",
+        config=Config(
+            max_pool_connections=concurrency,
+            retries={"mode": "standard", "max_attempts": 1},
+        ),
+    )
+    payloads = [
+        {"warmer": True, "concurrency": concurrency, "invocation": i}
+        for i in range(1, concurrency)
+    ]
+    with ThreadPoolExecutor(max_workers=concurrency - 1) as pool:
+        results = list(
+            pool.map(
+                lambda payload: _invoke(client, context.invoked_function_arn, payload),
+                payloads,
+            )
+        )
+    results = [result for result in results if result]
+    return (
+        sum(1 for result in results if result.get("cold")),
+        {result.get("container") for result in results},
+    )
+
+
+def handle(event, context=None):
+    """Handle a warm-up event.
+
+    Returns None if event is not a warm-up, else the value the handler
+    should return.
+    """
+    global _cold
+
+    if not isinstance(event, dict) or not event.get("warmer"):
+        _cold = False
+        return None
+
+    cold, _cold = _cold, False
+    concurrency = int(event.get("concurrency", 1))
+
+    if "invocation" in event:
+        # A copy: keep the container busy while the others are invoked
+        time.sleep(WARMUP_DELAY)
+        return {"cold": cold, "container": CONTAINER}
+
+    cold_copies, containers = 0, set()
+    if concurrency > 1 and context is not None:
+        try:
+            cold_copies, containers = _fan_out(context, concurrency)
+        except Exception:
+            logger.exception("Warm-up fan-out failed")
+    containers = len(containers | {CONTAINER})
+
+    logger.info(
+        "Warm-up of %d containers, %d distinct answered, %d were cold",
+        concurrency,
+        containers,
+        cold_copies + cold,
+    )
+    return {
+        "cold": cold,
+        "containers": concurrency,
+        "distinct_containers": containers,
+        "cold_containers": cold_copies + cold,
+    }
+
+
+def is_warmup(event, context=None) -> bool:
+    """Handle a warm-up event, return True if event was one."""
+    return handle(event, context) is not None
+
+
+def skip_warmup(handler):
+    """Decorator returning early on warm-up events."""
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        result = handle(event, context)
+        if result is not None:
+            return result
+        return handler(event, context)
+
+    return wrapper
@@ -0,0 +1,39 @@
+"""Connection manager of DynamoWebsocket ($connect, heartbeat, $disconnect).
+
+Clients send {"action": "heartbeat"} more often than CONNECTION_TTL, each
+one pushes the expiresAt of their connection back, DynamoDB TTL and the
+sweeper remove the connections that stopped.
+"""
+
+import logging
+import os
+
+import boto3
+
+from helpers import connections
+
+LOGGER = logging.getLogger()
+LOGGER.setLevel(logging.INFO)
+
+TABLE = boto3.resource("dynamodb", region_name=os.environ["REGION"]).Table(
+    os.environ["CONNECTION_TABLE_NAME"]
+)
+
+
+def handler(event, context):
+    route = event["requestContext"]["routeKey"]
+    connection_id = event["requestContext"]["connectionId"]
+
+    if route == "$connect":
+        connections.register(TABLE, connection_id)
+    elif route == "heartbeat":
+        # Already swept but still open: register it again
+        if not connections.heartbeat(TABLE, connection_id):
+            LOGGER.info(f"Heartbeat of unknown connection {connection_id}")
+            connections.register(TABLE, connection_id)
+    elif route == "$disconnect":
+        TABLE.delete_item(Key={"connectionId": connection_id})
+    else:
+        return {"statusCode": 400, "body": f"Unknown route {route}"}
+
+    return {"statusCode": 200}
@@ -0,0 +1,33 @@
+"""Scheduled sweeper of the DynamoWebsocket connection table."""
+
+import logging
+import os
+import time
+
+import boto3
+
+from helpers.connections import sweep
+
+LOGGER = logging.getLogger()
+LOGGER.setLevel(logging.INFO)
+
+# Seconds left to the last page of the sweep
+SWEEP_MARGIN = 10
+
+TABLE = boto3.resource("dynamodb", region_name=os.environ["REGION"]).Table(
+    os.environ["CONNECTION_TABLE_NAME"]
+)
+API = boto3.client(
+    "apigatewaymanagementapi",
+    region_name=os.environ["REGION"],
+    endpoint_url=os.environ["WEBSOCKET_ENDPOINT"],
+)
+
+
+def handler(event, context):
+    deadline = (
+        time.monotonic() + context.get_remaining_time_in_millis() / 1000 - SWEEP_MARGIN
+    )
+    deleted = sweep(API, TABLE, deadline=deadline)
+    LOGGER.info(f"Deleted {deleted} stale connections")
+    return {"deleted": deleted}
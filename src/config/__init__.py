@@ -0,0 +1,2 @@
+from .spec import load_spec, validate_spec, SpecError
+from .builder import ConfigStack, build_app
@@ -0,0 +1,178 @@
+from constructs import Construct
+
+from src.dynamo import DynamoDB
+from src.streaming import DynamoWebsocket
+from src.api import RESTApi
+from src.timestream import Timestream
+from src.lambdas import ScheduledLambdas, InvokableLambdas
+from src.stacks import ProjectStack
+from src.config.spec import REF
+
+
+class ConfigStack(ProjectStack):
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        spec: dict,
+        stack: dict,
+        refs: dict,
+    ):
+        """One stack of a spec, with its own state file
+
+        Resources are built in the order of spec.STACK_SECTIONS. Every
+        resource built registers its attributes in refs, so the following
+        sections and stacks can reference them ("@dynamodb.crud_arn"). A
+        reference to another stack becomes a cross-stack output.
+        """
+        super().__init__(scope, id, spec["project"], spec["env"], spec["owner"])
+
+        self.refs = refs
+        tags = self.tags
+
+        if "timestream" in stack:
+            database = Timestream(self, "timestream", tags=tags)
+            refs["timestream.db_name"] = database.db_name
+            for table in stack["timestream"]["tables"]:
+                table_name, crud_arn = database.add_table(
+                    table["name"],
+                    magnetic_days=table.get("magnetic_days", 30),
+                    memory_hours=table.get("memory_hours", 24),
+                )
+                refs[f"timestream.{table['name']}.table_name"] = table_name
+                refs[f"timestream.{table['name']}.crud_arn"] = crud_arn
+
+        if "dynamodb" in stack:
+            dynamo = DynamoDB(
+                self,
+                "dynamo",
+                isstream=stack["dynamodb"].get("stream", False),
+                tags=tags,
+                tracing=stack["dynamodb"].get("tracing", False),
+                websocket=stack["dynamodb"].get("websocket", True),
+                point_in_time_recovery=stack["dynamodb"].get(
+                    "point_in_time_recovery", False
+                ),
+            )
+            refs["dynamodb.table_name"] = dynamo.table_name
+            refs["dynamodb.table_arn"] = dynamo.table_arn
+            refs["dynamodb.crud_arn"] = dynamo.crud_arn
+            refs["dynamodb.stream_arn"] = dynamo.stream_arn
+            refs["dynamodb.stream_policy_arn"] = dynamo.stream_policy_arn
+
+        if "websocket" in stack:
+            DynamoWebsocket(
+                self,
+                "websocket-stream",
+                refs["dynamodb.stream_arn"],
+                refs["dynamodb.stream_policy_arn"],
+                tags=tags,
+                tracing=stack["websocket"].get("tracing", False),
+                connection_ttl=stack["websocket"].get("connection_ttl", 3600),
+                sweeper_filename=stack["websocket"].get("sweeper_filename"),
+                sweep_schedule=stack["websocket"].get(
+                    "sweep_schedule", "rate(15 minutes)"
+                ),
+                runtime=stack["websocket"].get("runtime"),
+                optimize=stack["websocket"].get("optimize", False),
+                log_retention=stack["websocket"].get("log_retention", 30),
+                log_level=stack["websocket"].get("log_level", "INFO"),
+                log_format=stack["websocket"].get("log_format", "TEXT"),
+            )
+
+        for function in stack.get("scheduled", []):
+            scheduled = ScheduledLambdas(
+                self,
+                f"scheduled-{function['name']}",
+                name=function["name"],
+                schedule_expression=function["schedule"],
+                filename=function["filename"],
+                policies=self.resolve(function.get("policies", [])),
+                memory_size=function["memory_size"],
+                timeout=function["timeout"],
+                environement=self.resolve(function.get("environement", {})),
+                tags=tags,
+                tracing=function.get("tracing", False),
+                shards=function.get("shards", 1),
+                checkpoint=function.get("checkpoint", False),
+                runtime=function.get("runtime"),
+                optimize=function.get("optimize", False),
+                log_retention=function.get("log_retention", 30),
+                log_level=function.get("log_level", "INFO"),
+                log_format=function.get("log_format", "TEXT"),
+            )
+            if function.get("checkpoint"):
+                refs[f"scheduled.{function['name']}.checkpoint_table_name"] = (
+                    scheduled.checkpoint_table_name
+                )
+
+        for function in stack.get("invokable", []):
+            InvokableLambdas(
+                self,
+                f"invokable-{function['name']}",
+                name=function["name"],
+                filename=function["filename"],
+                policies=self.resolve(function.get("policies", [])),
+                invoke_principal=function["invoke_principal"],
+                invoke_from_arn=function["invoke_from_arn"],
+                memory_size=function["memory_size"],
+                timeout=function["timeout"],
+                environement=self.resolve(function.get("environement", {})),
+                tags=tags,
+                tracing=function.get("tracing", False),
+                warm_concurrency=function.get("warm_concurrency", 0),
+                warm_schedule=function.get("warm_schedule", "rate(5 minutes)"),
+                runtime=function.get("runtime"),
+                optimize=function.get("optimize", False),
+                log_retention=function.get("log_retention", 30),
+                log_level=function.get("log_level", "INFO"),
+                log_format=function.get("log_format", "TEXT"),
+            )
+
+        if "rest" in stack:
+            api = RESTApi(
+                self,
+                "api",
+                endpoint_name=stack["rest"]["endpoint_name"],
+                tags=tags,
+                tracing=stack["rest"].get("tracing", False),
+                log_retention=stack["rest"].get("log_retention", 30),
+                log_level=stack["rest"].get("log_level", "INFO"),
+                log_format=stack["rest"].get("log_format", "TEXT"),
+            )
+            for endpoint in stack["rest"]["endpoints"]:
+                api.add_endpoint(
+                    http=endpoint["http"].upper(),
+                    policies=self.resolve(endpoint.get("policies", [])),
+                    filename=endpoint["filename"],
+                    environement=self.resolve(endpoint.get("environement", {})),
+                    timeout=endpoint.get("timeout", 5),
+                    resource=endpoint.get("resource", "data"),
+                    warm_concurrency=endpoint.get("warm_concurrency", 0),
+                    warm_schedule=endpoint.get("warm_schedule", "rate(5 minutes)"),
+                    runtime=endpoint.get("runtime"),
+                    optimize=endpoint.get("optimize", False),
+                )
+            api.finalize()
+
+    def resolve(self, value):
+        """Replace "@..." references, returns new lists and dicts."""
+        if isinstance(value, list):
+            return [self.resolve(v) for v in value]
+        if isinstance(value, dict):
+            return {k: self.resolve(v) for k, v in value.items()}
+
+        match = REF.match(value)
+        return self.refs[match.group(1)] if match else value
+
+
+def build_app(scope: Construct, spec: dict):
+    """Create one ConfigStack per entry of spec["stacks"], in order.
+
+    Stacks are named "<project>-<stack>" and returned by stack name.
+    """
+    refs = {}
+    return {
+        name: ConfigStack(scope, f"{spec['project']}-{name}", spec, stack, refs)
+        for name, stack in spec["stacks"].items()
+    }
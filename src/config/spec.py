@@ -0,0 +1,339 @@
+import json
+import re
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from src.lambdas.logs import LOG_FORMATS, LOG_LEVELS, RETENTION_DAYS
+from src.lambdas.runtime import PYTHON_RUNTIMES
+from src.lambdas.warmup import MAX_WARM_CONCURRENCY
+
+# Fields of each section: name -> (type, required)
+PROJECT_FIELDS = {
+    "project": (str, True),
+    "env": (str, True),
+    "owner": (str, True),
+    "stacks": (dict, True),
+}
+
+SECTION_FIELDS = {
+    "timestream": {
+        "tables": (list, True),
+    },
+    "timestream.tables": {
+        "name": (str, True),
+        "magnetic_days": (int, False),
+        "memory_hours": (int, False),
+    },
+    "dynamodb": {
+        "stream": (bool, False),
+        "tracing": (bool, False),
+        "websocket": (bool, False),
+        "point_in_time_recovery": (bool, False),
+    },
+    "websocket": {
+        "tracing": (bool, False),
+        "connection_ttl": (int, False),
+        "sweeper_filename": (str, False),
+        "sweep_schedule": (str, False),
+        "runtime": (str, False),
+        "optimize": (bool, False),
+        "log_retention": (int, False),
+        "log_level": (str, False),
+        "log_format": (str, False),
+    },
+    "scheduled": {
+        "name": (str, True),
+        "schedule": (str, True),
+        "filename": (str, True),
+        "policies": (list, False),
+        "memory_size": (int, True),
+        "timeout": (int, True),
+        "environement": (dict, False),
+        "tracing": (bool, False),
+        "shards": (int, False),
+        "checkpoint": (bool, False),
+        "runtime": (str, False),
+        "optimize": (bool, False),
+        "log_retention": (int, False),
+        "log_level": (str, False),
+        "log_format": (str, False),
+    },
+    "invokable": {
+        "name": (str, True),
+        "filename": (str, True),
+        "policies": (list, False),
+        "invoke_principal": (str, True),
+        "invoke_from_arn": (str, True),
+        "memory_size": (int, True),
+        "timeout": (int, True),
+        "environement": (dict, False),
+        "tracing": (bool, False),
+        "warm_concurrency": (int, False),
+        "warm_schedule": (str, False),
+        "runtime": (str, False),
+        "optimize": (bool, False),
+        "log_retention": (int, False),
+        "log_level": (str, False),
+        "log_format": (str, False),
+    },
+    "rest": {
+        "endpoint_name": (str, True),
+        "endpoints": (list, True),
+        "tracing": (bool, False),
+        "log_retention": (int, False),
+        "log_level": (str, False),
+        "log_format": (str, False),
+    },
+    "rest.endpoints": {
+        "http": (str, True),
+        "filename": (str, True),
+        "policies": (list, False),
+        "environement": (dict, False),
+        "timeout": (int, False),
+        "resource": (str, False),
+        "warm_concurrency": (int, False),
+        "warm_schedule": (str, False),
+        "runtime": (str, False),
+        "optimize": (bool, False),
+    },
+}
+
+# Sections of a stack, in the order they are built
+STACK_SECTIONS = (
+    "timestream",
+    "dynamodb",
+    "websocket",
+    "scheduled",
+    "invokable",
+    "rest",
+)
+LIST_SECTIONS = ("scheduled", "invokable")
+STACK_FIELDS = {
+    section: (list if section in LIST_SECTIONS else dict, False)
+    for section in STACK_SECTIONS
+}
+
+HTTP_METHODS = ("GET", "PUT", "POST", "DELETE", "PATCH", "HEAD", "OPTIONS", "ANY")
+REST_RESOURCES = ("data", "pred", "sensor")
+STACK_NAME = re.compile(r"^[a-z0-9-]+$")
+REF = re.compile(r"^@([A-Za-z0-9_-]+(?:\.[A-Za-z0-9_-]+)*)$")
+
+
+class SpecError(ValueError):
+    def __init__(self, errors):
+        super().__init__(
+            "Invalid stack spec:\n" + "\n".join(f"  - {e}" for e in errors)
+        )
+        self.errors = errors
+
+
+def load_spec(path: str):
+    """Read a YAML (.yml, .yaml) or JSON stack spec and validate it."""
+    with open(path) as file:
+        if path.endswith((".yml", ".yaml")):
+            if yaml is None:
+                raise ImportError("PyYAML is required to read YAML specs")
+            spec = yaml.safe_load(file)
+        else:
+            spec = json.load(file)
+
+    validate_spec(spec)
+    return spec
+
+
+def _check_fields(obj, fields, where, errors):
+    """Append field errors of obj, return True if obj is valid."""
+    if not isinstance(obj, dict):
+        errors.append(f"{where}: expected a mapping")
+        return False
+
+    count = len(errors)
+
+    for key in obj:
+        if key not in fields:
+            errors.append(f"{where}: unknown field '{key}'")
+
+    for key, (kind, required) in fields.items():
+        if key not in obj:
+            if required:
+                errors.append(f"{where}: missing field '{key}'")
+            continue
+        value = obj[key]
+        # bool is an int, do not accept it for int fields
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            errors.append(f"{where}.{key}: expected {kind.__name__}")
+
+    return len(errors) == count
+
+
+def validate_spec(spec: dict):
+    """Check a stack spec before building anything.
+
+    References ("@dynamodb.crud_arn", "@timestream.<table>.table_name", ...)
+    must point to a resource built earlier: in a previous stack, or in a
+    previous section of the same stack. Raises SpecError with every
+    problem found.
+    """
+    errors = []
+    if not _check_fields(spec, PROJECT_FIELDS, "spec", errors) or errors:
+        raise SpecError(errors)
+
+    if not spec["stacks"]:
+        raise SpecError(["spec.stacks: at least one stack is required"])
+
+    refs = set()
+    names = {section: set() for section in LIST_SECTIONS}
+    singletons = {}
+    detached_stream = False
+
+    def check_refs(values, where):
+        for value in values:
+            if not isinstance(value, str):
+                errors.append(f"{where}: expected str")
+                continue
+            match = REF.match(value)
+            if match and match.group(1) not in refs:
+                errors.append(f"{where}: unknown reference '{value}'")
+
+    def check_logs(obj, where):
+        if obj.get("log_retention", 30) not in RETENTION_DAYS:
+            errors.append(f"{where}.log_retention: not a CloudWatch retention")
+        for key, values in (("log_level", LOG_LEVELS), ("log_format", LOG_FORMATS)):
+            value = obj.get(key)
+            if isinstance(value, str) and value.upper() not in values:
+                errors.append(f"{where}.{key}: must be one of {', '.join(values)}")
+
+    def check_lambda(obj, where):
+        check_logs(obj, where)
+        check_refs(obj.get("policies", []), f"{where}.policies")
+        for policy in obj.get("policies", []):
+            if isinstance(policy, str) and not (
+                REF.match(policy) or policy.startswith("arn:")
+            ):
+                errors.append(f"{where}.policies: '{policy}' is not an arn or ref")
+        check_refs(obj.get("environement", {}).values(), f"{where}.environement")
+        runtime = obj.get("runtime")
+        if isinstance(runtime, str) and runtime not in PYTHON_RUNTIMES:
+            errors.append(
+                f"{where}.runtime: must be one of {', '.join(PYTHON_RUNTIMES)}"
+            )
+        warm = obj.get("warm_concurrency", 0)
+        if isinstance(warm, int) and not 0 <= warm <= MAX_WARM_CONCURRENCY:
+            errors.append(
+                f"{where}.warm_concurrency: must be between 0 and {MAX_WARM_CONCURRENCY}"
+            )
+
+    for stack_name, stack in spec["stacks"].items():
+        where = f"stacks.{stack_name}"
+        if not STACK_NAME.match(stack_name):
+            errors.append(f"{where}: name must be lowercase letters, digits or '-'")
+        if not isinstance(stack, dict):
+            errors.append(f"{where}: expected a mapping")
+            continue
+        _check_fields(stack, STACK_FIELDS, where, errors)
+
+        for section in STACK_SECTIONS:
+            if not isinstance(stack.get(section), STACK_FIELDS[section][0]):
+                continue
+            swhere = f"{where}.{section}"
+
+            if section not in LIST_SECTIONS:
+                if section in singletons:
+                    errors.append(
+                        f"{swhere}: already defined in stacks.{singletons[section]}"
+                    )
+                singletons[section] = stack_name
+
+            # Invalid resources still register their refs, errors are
+            # reported once on the resource instead of on every consumer
+            if section == "timestream":
+                refs.add("timestream.db_name")
+                if not _check_fields(
+                    stack[section], SECTION_FIELDS[section], swhere, errors
+                ):
+                    continue
+                for i, table in enumerate(stack[section]["tables"]):
+                    _check_fields(
+                        table,
+                        SECTION_FIELDS["timestream.tables"],
+                        f"{swhere}.tables[{i}]",
+                        errors,
+                    )
+                    if isinstance(table, dict):
+                        refs.update(
+                            f"timestream.{table.get('name')}.{attr}"
+                            for attr in ("table_name", "crud_arn")
+                        )
+
+            elif section == "dynamodb":
+                refs.update(
+                    ("dynamodb.table_name", "dynamodb.table_arn", "dynamodb.crud_arn")
+                )
+                _check_fields(stack[section], SECTION_FIELDS[section], swhere, errors)
+                if stack[section].get("stream"):
+                    refs.update(("dynamodb.stream_arn", "dynamodb.stream_policy_arn"))
+                    detached_stream = not stack[section].get("websocket", True)
+
+            elif section == "websocket":
+                _check_fields(stack[section], SECTION_FIELDS[section], swhere, errors)
+                check_lambda(stack[section], swhere)
+                if not detached_stream:
+                    errors.append(
+                        f"{swhere}: needs a previous dynamodb with stream: true "
+                        "and websocket: false"
+                    )
+
+            elif section in LIST_SECTIONS:
+                for i, function in enumerate(stack[section]):
+                    fwhere = f"{swhere}[{i}]"
+                    if not _check_fields(
+                        function, SECTION_FIELDS[section], fwhere, errors
+                    ):
+                        continue
+                    if function.get("name") in names[section]:
+                        errors.append(f"{fwhere}: duplicate name '{function['name']}'")
+                    names[section].add(function.get("name"))
+                    if function.get("shards", 1) < 1:
+                        errors.append(f"{fwhere}.shards: must be at least 1")
+                    if function.get("checkpoint"):
+                        refs.add(f"scheduled.{function['name']}.checkpoint_table_name")
+                    check_lambda(function, fwhere)
+
+            elif section == "rest":
+                if not _check_fields(
+                    stack[section], SECTION_FIELDS[section], swhere, errors
+                ):
+                    continue
+                check_logs(stack[section], swhere)
+                if not stack[section]["endpoints"]:
+                    errors.append(
+                        f"{swhere}.endpoints: at least one endpoint is required"
+                    )
+                seen = set()
+                for i, endpoint in enumerate(stack[section]["endpoints"]):
+                    ewhere = f"{swhere}.endpoints[{i}]"
+                    if not _check_fields(
+                        endpoint, SECTION_FIELDS["rest.endpoints"], ewhere, errors
+                    ):
+                        continue
+                    http = endpoint["http"].upper()
+                    resource = endpoint.get("resource", "data")
+                    if http not in HTTP_METHODS:
+                        errors.append(f"{ewhere}.http: unknown method '{http}'")
+                    if resource not in REST_RESOURCES:
+                        errors.append(
+                            f"{ewhere}.resource: must be one of "
+                            f"{', '.join(REST_RESOURCES)}"
+                        )
+                    if (http, resource) in seen:
+                        errors.append(f"{ewhere}: duplicate {http} on '{resource}'")
+                    seen.add((http, resource))
+                    if not 0 < endpoint.get("timeout", 5) <= 30:
+                        errors.append(f"{ewhere}.timeout: must be between 1 and 30")
+                    check_lambda(endpoint, ewhere)
+
+    if errors:
+        raise SpecError(errors)
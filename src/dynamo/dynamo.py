@@ -18,6 +18,9 @@ class DynamoDB(Construct):
         id: str,
         isstream: bool,
         tags: dict,
+        tracing: bool = False,
+        websocket: bool = True,
+        point_in_time_recovery: bool = False,
     ):
         """Resources for DynamoDB Project table
 
@@ -26,6 +29,11 @@ class DynamoDB(Construct):
             DynamodbTable: The table (keys, capacities etc.)
             IamPolicy: Crud permissions on table
             if isstream: Stream policy and Websocket API
+            if tracing: X-Ray active tracing on the websocket lambdas
+
+        With websocket=False the stream is enabled without its Websocket API,
+        build it from stream_arn and stream_policy_arn (in another stack).
+        point_in_time_recovery is required by exports to S3 (AnalyticsExport).
         """
         super().__init__(scope, id)
 
@@ -40,6 +48,7 @@ class DynamoDB(Construct):
             range_key="Timestamp",
             stream_enabled=isstream,
             stream_view_type="NEW_IMAGE" if isstream else None,
+            point_in_time_recovery={"enabled": point_in_time_recovery},
             attribute=[
                 dict(name="DeviceID", type="S"),
                 dict(name="Timestamp", type="N"),
@@ -77,6 +86,9 @@ class DynamoDB(Construct):
             tags=tags,
         )
 
+        self.stream_arn = None
+        self.stream_policy_arn = None
+
         if isstream:
 
             read_stream = IamPolicy(
@@ -103,13 +115,19 @@ class DynamoDB(Construct):
                 tags=tags,
             )
 
-            DynamoWebsocket(
-                self,
-                "websocket-stream",
-                table.stream_arn,
-                read_stream.arn,
-                tags=tags,
-            )
+            self.stream_arn = table.stream_arn
+            self.stream_policy_arn = read_stream.arn
+
+            if websocket:
+                DynamoWebsocket(
+                    self,
+                    "websocket-stream",
+                    table.stream_arn,
+                    read_stream.arn,
+                    tags=tags,
+                    tracing=tracing,
+                )
 
         self.table_name = table.name
+        self.table_arn = table.arn
         self.crud_arn = table_crud.arn
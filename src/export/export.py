@@ -0,0 +1,480 @@
+import json
+import re
+from constructs import Construct
+from cdktf import TerraformOutput
+from cdktf_cdktf_provider_aws.data_aws_iam_policy_document import (
+    DataAwsIamPolicyDocument,
+)
+from cdktf_cdktf_provider_aws.data_aws_caller_identity import DataAwsCallerIdentity
+from cdktf_cdktf_provider_aws.iam_policy import IamPolicy
+from cdktf_cdktf_provider_aws.iam_role import IamRole
+from cdktf_cdktf_provider_aws.s3_bucket import S3Bucket
+from cdktf_cdktf_provider_aws.s3_bucket_public_access_block import (
+    S3BucketPublicAccessBlock,
+)
+from cdktf_cdktf_provider_aws.s3_bucket_lifecycle_configuration import (
+    S3BucketLifecycleConfiguration,
+)
+from cdktf_cdktf_provider_aws.glue_catalog_database import GlueCatalogDatabase
+from cdktf_cdktf_provider_aws.glue_crawler import GlueCrawler
+from cdktf_cdktf_provider_aws.athena_workgroup import AthenaWorkgroup
+from cdktf_cdktf_provider_aws.lambda_function import LambdaFunction
+from cdktf_cdktf_provider_aws.lambda_permission import LambdaPermission
+from cdktf_cdktf_provider_aws.cloudwatch_log_group import CloudwatchLogGroup
+from cdktf_cdktf_provider_aws.cloudwatch_event_rule import CloudwatchEventRule
+from cdktf_cdktf_provider_aws.cloudwatch_event_target import CloudwatchEventTarget
+
+from src.lambdas import (
+    check_retention,
+    lambda_runtime,
+    logging_environement,
+    tuning_environement,
+)
+
+# Bucket prefixes, tables are one folder below them (s3://bucket/prefix/table/)
+TIMESTREAM_PREFIX = "timestream"
+DYNAMODB_PREFIX = "dynamodb"
+DYNAMODB_RAW_PREFIX = "dynamodb-raw"
+ATHENA_PREFIX = "athena-results"
+
+
+class AnalyticsExport(Construct):
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        name: str,
+        filename: str,
+        tags: dict,
+        timestream_db_name: str = None,
+        timestream_tables: list = None,
+        dynamodb_table_arn: str = None,
+        schedule_expression: str = "cron(0 2 * * ? *)",
+        layers: list = None,
+        memory_size: int = 1024,
+        timeout: int = 900,
+        raw_days: int = 7,
+        tracing: bool = False,
+        runtime: str = None,
+        optimize: bool = False,
+        log_retention: int = 30,
+        log_level: str = "INFO",
+        log_format: str = "TEXT",
+    ):
+        """Daily Parquet exports of the project tables for analytics
+
+        Every run unloads the previous day of each Timestream table to
+        s3://bucket/timestream/<table>/results/dt=<day>/ (UNLOAD, Parquet)
+        and snapshots the DynamoDB table with export-to-S3 (point in time
+        recovery must be enabled). DynamoDB exports are written as
+        DYNAMODB_JSON, the next run converts the completed ones to
+        s3://bucket/dynamodb/<table>/dt=<day>/. The crawler then catalogs
+        one table per source table for Athena.
+
+        Resources:
+        ----------
+            S3Bucket: Exports and Athena results, not public
+            S3BucketLifecycleConfiguration: Expire raw exports and query results
+            GlueCatalogDatabase: Catalog of the exports
+            IamRole and IamPolicy: Crawler role, read the bucket
+            GlueCrawler: Tables and dt partitions of the exports
+            AthenaWorkgroup: Workgroup writing results to the bucket
+            IamPolicy: Read access to the exports for analysts and lambdas
+            IamRole and IamPolicy: Export lambda role
+            LambdaFunction: The export lambda
+            CloudwatchLogGroup: Logs for the lambda
+            CloudwatchEventRule: Schedule
+            CloudwatchEventTarget: The export lambda
+            LambdaPermission: Allow execution from the rule
+        """
+        super().__init__(scope, id)
+
+        timestream_tables = timestream_tables or []
+        if not dynamodb_table_arn and not (timestream_db_name and timestream_tables):
+            raise ValueError(
+                "AnalyticsExport needs a DynamoDB table or Timestream tables"
+            )
+
+        suffix = f'-{tags["project"]}-{tags["env"]}'
+        # Glue and Athena names: lowercase, digits and underscores
+        catalog_name = re.sub(r"[^a-z0-9_]", "_", f"{name}{suffix}".lower())
+
+        account = DataAwsCallerIdentity(self, "current")
+
+        bucket = S3Bucket(
+            self,
+            "bucket",
+            bucket=re.sub(r"[^a-z0-9-]", "-", f"analytics-{name}{suffix}".lower()),
+            tags=tags,
+        )
+
+        S3BucketPublicAccessBlock(
+            self,
+            "bucket-private",
+            bucket=bucket.id,
+            block_public_acls=True,
+            block_public_policy=True,
+            ignore_public_acls=True,
+            restrict_public_buckets=True,
+        )
+
+        S3BucketLifecycleConfiguration(
+            self,
+            "bucket-lifecycle",
+            bucket=bucket.id,
+            rule=[
+                {
+                    "id": prefix,
+                    "status": "Enabled",
+                    "filter": [{"prefix": f"{prefix}/"}],
+                    "expiration": [{"days": raw_days}],
+                }
+                for prefix in (DYNAMODB_RAW_PREFIX, ATHENA_PREFIX)
+            ],
+        )
+
+        database = GlueCatalogDatabase(self, "database", name=catalog_name)
+
+        read_bucket = IamPolicy(
+            self,
+            "read-bucket",
+            name=f"AnalyticsExport-{name}{suffix}-READ",
+            policy=json.dumps(
+                {
+                    "Version": "2012-10-17",
+                    "Statement": [
+                        {
+                            "Action": ["s3:GetObject"],
+                            "Resource": [f"{bucket.arn}/*"],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": ["s3:ListBucket", "s3:GetBucketLocation"],
+                            "Resource": [bucket.arn],
+                            "Effect": "Allow",
+                        },
+                    ],
+                }
+            ),
+            tags=tags,
+        )
+
+        crawler_assume = DataAwsIamPolicyDocument(
+            self,
+            "crawler-assume",
+            statement=[
+                {
+                    "actions": ["sts:AssumeRole"],
+                    "principals": [
+                        {
+                            "type": "Service",
+                            "identifiers": ["glue.amazonaws.com"],
+                        }
+                    ],
+                }
+            ],
+        )
+
+        crawler_role = IamRole(
+            self,
+            "crawler-role",
+            name=f"AnalyticsCrawler-{name}{suffix}",
+            assume_role_policy=crawler_assume.json,
+            managed_policy_arns=[
+                "arn:aws:iam::aws:policy/service-role/AWSGlueServiceRole",
+                read_bucket.arn,
+            ],
+            tags=tags,
+        )
+
+        targets = []
+        if timestream_tables:
+            targets.append(f"s3://{bucket.bucket}/{TIMESTREAM_PREFIX}/")
+        if dynamodb_table_arn:
+            targets.append(f"s3://{bucket.bucket}/{DYNAMODB_PREFIX}/")
+
+        crawler = GlueCrawler(
+            self,
+            "crawler",
+            name=f"AnalyticsExport-{name}{suffix}",
+            database_name=database.name,
+            role=crawler_role.arn,
+            s3_target=[
+                {"path": path, "exclusions": ["**.json", "**_SUCCESS"]}
+                for path in targets
+            ],
+            schema_change_policy={
+                "delete_behavior": "LOG",
+                "update_behavior": "UPDATE_IN_DATABASE",
+            },
+            # s3://bucket/prefix/table/: tables are at level 3, the folders
+            # below them are partitions
+            configuration=json.dumps(
+                {
+                    "Version": 1.0,
+                    "Grouping": {"TableLevelConfiguration": 3},
+                    "CrawlerOutput": {
+                        "Partitions": {"AddOrUpdateBehavior": "InheritFromTable"}
+                    },
+                }
+            ),
+            tags=tags,
+        )
+
+        workgroup = AthenaWorkgroup(
+            self,
+            "workgroup",
+            name=catalog_name,
+            configuration={
+                "enforce_workgroup_configuration": True,
+                "result_configuration": {
+                    "output_location": f"s3://{bucket.bucket}/{ATHENA_PREFIX}/"
+                },
+            },
+            force_destroy=True,
+            tags=tags,
+        )
+
+        read = IamPolicy(
+            self,
+            "read",
+            name=f"AnalyticsExport-{name}{suffix}-QUERY",
+            policy=json.dumps(
+                {
+                    "Version": "2012-10-17",
+                    "Statement": [
+                        {
+                            "Action": ["s3:GetObject"],
+                            "Resource": [f"{bucket.arn}/*"],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": ["s3:PutObject"],
+                            "Resource": [f"{bucket.arn}/{ATHENA_PREFIX}/*"],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": ["s3:ListBucket", "s3:GetBucketLocation"],
+                            "Resource": [bucket.arn],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": [
+                                "glue:GetDatabase",
+                                "glue:GetTable",
+                                "glue:GetTables",
+                                "glue:GetPartition",
+                                "glue:GetPartitions",
+                            ],
+                            "Resource": [
+                                f"arn:aws:glue:ap-southeast-2:{account.account_id}:catalog",
+                                database.arn,
+                                f"arn:aws:glue:ap-southeast-2:{account.account_id}:"
+                                f"table/{catalog_name}/*",
+                            ],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": [
+                                "athena:StartQueryExecution",
+                                "athena:StopQueryExecution",
+                                "athena:GetQueryExecution",
+                                "athena:GetQueryResults",
+                                "athena:GetWorkGroup",
+                            ],
+                            "Resource": [workgroup.arn],
+                            "Effect": "Allow",
+                        },
+                    ],
+                }
+            ),
+            tags=tags,
+        )
+
+        statements = [
+            {
+                "Action": [
+                    "s3:PutObject",
+                    "s3:GetObject",
+                    "s3:AbortMultipartUpload",
+                ],
+                "Resource": [f"{bucket.arn}/*"],
+                "Effect": "Allow",
+            },
+            {
+                "Action": [
+                    "s3:ListBucket",
+                    "s3:GetBucketAcl",
+                    "s3:GetBucketLocation",
+                ],
+                "Resource": [bucket.arn],
+                "Effect": "Allow",
+            },
+            {
+                "Action": ["glue:StartCrawler"],
+                "Resource": [crawler.arn],
+                "Effect": "Allow",
+            },
+        ]
+        if timestream_tables:
+            statements += [
+                {
+                    "Action": ["timestream:DescribeEndpoints"],
+                    "Resource": ["*"],
+                    "Effect": "Allow",
+                },
+                {
+                    "Action": ["timestream:Select"],
+                    "Resource": [
+                        f"arn:aws:timestream:ap-southeast-2:{account.account_id}:"
+                        f"database/{timestream_db_name}/table/{table}"
+                        for table in timestream_tables
+                    ],
+                    "Effect": "Allow",
+                },
+            ]
+        if dynamodb_table_arn:
+            statements += [
+                {
+                    "Action": ["dynamodb:ExportTableToPointInTime"],
+                    "Resource": [dynamodb_table_arn],
+                    "Effect": "Allow",
+                },
+                # ListExports has no resource level permissions
+                {
+                    "Action": ["dynamodb:ListExports"],
+                    "Resource": ["*"],
+                    "Effect": "Allow",
+                },
+                # DynamoDB writes the export with the credentials of the role
+                {
+                    "Action": ["s3:PutObjectAcl"],
+                    "Resource": [f"{bucket.arn}/{DYNAMODB_RAW_PREFIX}/*"],
+                    "Effect": "Allow",
+                },
+                {
+                    "Action": ["dynamodb:DescribeExport"],
+                    "Resource": [f"{dynamodb_table_arn}/export/*"],
+                    "Effect": "Allow",
+                },
+            ]
+
+        export_policy = IamPolicy(
+            self,
+            "export-policy",
+            name=f"AnalyticsExport-{name}{suffix}-EXPORT",
+            policy=json.dumps({"Version": "2012-10-17", "Statement": statements}),
+            tags=tags,
+        )
+
+        assume = DataAwsIamPolicyDocument(
+            self,
+            "assume",
+            statement=[
+                {
+                    "actions": ["sts:AssumeRole"],
+                    "principals": [
+                        {
+                            "type": "Service",
+                            "identifiers": ["lambda.amazonaws.com"],
+                        }
+                    ],
+                }
+            ],
+        )
+
+        role = IamRole(
+            self,
+            "role",
+            name=f"AnalyticsExport-{name}{suffix}",
+            assume_role_policy=assume.json,
+            managed_policy_arns=[
+                "arn:aws:iam::092201464628:policy/LambdaLogging",
+                "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                export_policy.arn,
+            ]
+            + (["arn:aws:iam::aws:policy/AWSXRayDaemonWriteAccess"] if tracing else []),
+            tags=tags,
+        )
+
+        environement = {
+            "REGION": "ap-southeast-2",
+            "EXPORT_BUCKET": bucket.bucket,
+            "GLUE_CRAWLER_NAME": crawler.name,
+            **tuning_environement(optimize),
+            **logging_environement(log_level, log_format),
+        }
+        if timestream_tables:
+            environement.update(
+                {
+                    "TIMESTREAM_DATABASE_NAME": timestream_db_name,
+                    "TIMESTREAM_TABLES": ",".join(timestream_tables),
+                }
+            )
+        if dynamodb_table_arn:
+            environement.update(
+                {
+                    "DYNAMODB_TABLE_ARN": dynamodb_table_arn,
+                    "DYNAMODB_RAW_PREFIX": DYNAMODB_RAW_PREFIX,
+                }
+            )
+
+        function = LambdaFunction(
+            self,
+            "lambda",
+            filename=filename,
+            function_name=f"{tags['project']}-export-{name}-{tags['env']}",
+            source_code_hash="1",
+            role=role.arn,
+            handler=f"{filename.split('/')[-1].split('.')[0]}.handler",
+            runtime=lambda_runtime(self, runtime),
+            memory_size=memory_size,
+            timeout=timeout,
+            layers=layers,
+            environment={"variables": environement},
+            tracing_config={"mode": "Active"} if tracing else None,
+            tags=tags,
+        )
+
+        CloudwatchLogGroup(
+            self,
+            "logs",
+            name=f"/aws/lambda/{function.function_name}",
+            retention_in_days=check_retention(log_retention),
+            tags=tags,
+        )
+
+        schedule = CloudwatchEventRule(
+            self,
+            "rule",
+            name=f"{name}-Export",
+            schedule_expression=schedule_expression,
+            tags=tags,
+        )
+
+        CloudwatchEventTarget(
+            self,
+            "target",
+            rule=schedule.name,
+            arn=function.arn,
+        )
+
+        LambdaPermission(
+            self,
+            "permission",
+            statement_id="AllowExecutionFromCloudWatch",
+            action="lambda:InvokeFunction",
+            function_name=function.function_name,
+            principal="events.amazonaws.com",
+            source_arn=schedule.arn,
+        )
+
+        TerraformOutput(self, "analytics_bucket", value=bucket.bucket)
+        TerraformOutput(self, "analytics_database", value=database.name)
+        TerraformOutput(self, "analytics_workgroup", value=workgroup.name)
+
+        self.bucket_name = bucket.bucket
+        self.database_name = database.name
+        self.workgroup_name = workgroup.name
+        self.read_arn = read.arn
+        self.read_bucket_arn = read_bucket.arn
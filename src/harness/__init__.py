@@ -0,0 +1,9 @@
+from .events import (
+    LambdaContext,
+    api_event,
+    websocket_event,
+    stream_event,
+    schedule_event,
+)
+from .standins import StandIns
+from .runner import LoadResult, load_handler, measure_allocations, run_load
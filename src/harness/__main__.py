@@ -0,0 +1,124 @@
+"""Run a handler in-process under load.
+
+Usage:
+    python -m src.harness src/code/table_get.py --event api --method GET \\
+        --query DeviceID=A0 --table ProjectTable:DeviceID:Timestamp \\
+        --env TABLE_NAME=ProjectTable --requests 1000 --concurrency 8
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from .events import api_event, schedule_event, stream_event, websocket_event
+from .runner import load_handler, run_load
+from .standins import StandIns
+
+
+def _pairs(values):
+    return dict(value.split("=", 1) for value in values)
+
+
+def _tables(values):
+    tables = {}
+    for value in values:
+        name, hash_key, *range_key = value.split(":")
+        tables[name] = (hash_key, range_key[0] if range_key else None)
+    return tables
+
+
+def event_factory(args):
+    if args.event == "api":
+        body = json.loads(args.body) if args.body else None
+        return lambda i: api_event(args.method, args.path, _pairs(args.query), body)
+    if args.event == "websocket":
+        return lambda i: websocket_event(args.route, body=args.body)
+    if args.event == "stream":
+        return lambda i: stream_event(
+            [
+                {"DeviceID": f"A{j % 4}", "Timestamp": i * args.records + j, "value": j}
+                for j in range(args.records)
+            ]
+        )
+    return lambda i: (
+        schedule_event(i % args.shards, args.shards)
+        if args.shards > 1
+        else schedule_event()
+    )
+
+
+def seed_connections(count, table_name):
+    import boto3
+
+    table = boto3.resource("dynamodb").Table(table_name)
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={"connectionId": f"conn-{i}"})
+    return {f"conn-{i}" for i in range(count)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.harness")
+    parser.add_argument("handler", help="lambda .py file or zip")
+    parser.add_argument(
+        "--event", choices=["api", "websocket", "stream", "schedule"], default="api"
+    )
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--query", action="append", default=[], help="KEY=VALUE")
+    parser.add_argument("--body", help="JSON body (api, websocket)")
+    parser.add_argument("--route", default="$connect", help="websocket route")
+    parser.add_argument(
+        "--records", type=int, default=10, help="records per stream event"
+    )
+    parser.add_argument("--shards", type=int, default=1, help="schedule shards")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE")
+    parser.add_argument(
+        "--table", action="append", default=[], help="NAME:HASH[:RANGE] in moto"
+    )
+    parser.add_argument(
+        "--connections", type=int, default=0, help="live websocket connections"
+    )
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="JSON summary")
+    args = parser.parse_args(argv)
+
+    environement = _pairs(args.env)
+    standins = StandIns(tables=_tables(args.table))
+    with standins.active():
+        if args.connections:
+            standins.management.connections = seed_connections(
+                args.connections, environement["CONNECTION_TABLE_NAME"]
+            )
+        start = time.perf_counter()
+        handler = load_handler(args.handler, environement)
+        import_ms = round((time.perf_counter() - start) * 1000, 3)
+        summary = run_load(
+            handler, event_factory(args), args.requests, args.concurrency
+        ).summary()
+        summary["import_ms"] = import_ms
+
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        latency = summary["latency_ms"]
+        allocations = summary["allocations_kb"]
+        print(
+            f"{summary['requests']} requests, concurrency {summary['concurrency']}, "
+            f"{summary['errors']} errors, {summary['throughput_rps']} req/s\n"
+            f"handler import: {summary['import_ms']} ms\n"
+            f"latency ms: p50 {latency['p50']}  p90 {latency['p90']}  "
+            f"p99 {latency['p99']}  max {latency['max']}\n"
+            f"allocations per invocation: {allocations['mean']} KB retained, "
+            f"{allocations['peak']} KB peak"
+        )
+        if summary["first_error"]:
+            print(f"first error:\n{summary['first_error']}", file=sys.stderr)
+
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Compare a handler on several interpreters before changing the runtime.
+
+Every interpreter runs the harness in a subprocess (it needs boto3 and
+moto installed), `rounds` times, and the medians are compared to the
+first interpreter. Zips are benchmarked as packaged, .pyc included.
+
+Usage:
+    python -m src.harness.bench src/code/table_get.py \\
+        --python python3.9 --python python3.11 --optimize \\
+        -- --event api --query DeviceID=A0 \\
+        --table ProjectTable:DeviceID:Timestamp --env TABLE_NAME=ProjectTable
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def python_version(python):
+    """Version of an interpreter, None if it cannot run."""
+    try:
+        return subprocess.run(
+            [python, "-c", "import platform; print(platform.python_version())"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_harness(python, handler, harness_args, optimize=False):
+    """Harness summary of one run, {"error": ...} if it did not report."""
+    env = dict(os.environ)
+    env.pop("PYTHONOPTIMIZE", None)
+    if optimize:
+        env["PYTHONOPTIMIZE"] = "1"
+
+    process = subprocess.run(
+        [python, "-m", "src.harness", handler, "--json", *harness_args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return json.loads(process.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"error": process.stderr.strip()[-2000:] or "no output"}
+
+
+def _median(values):
+    return round(statistics.median(values), 3)
+
+
+def benchmark(handler, pythons, harness_args, rounds=3, optimize=False):
+    """One row per interpreter (and per PYTHONOPTIMIZE with optimize).
+
+    Latencies, throughput and import time are the medians of the rounds,
+    speedup is the p50 of the first row divided by the p50 of the row.
+    """
+    rows = []
+    for python in pythons:
+        version = python_version(python)
+        for optimized in (False, True) if optimize else (False,):
+            row = {"python": python, "version": version, "optimize": optimized}
+            if version is None:
+                rows.append({**row, "error": "interpreter not found"})
+                continue
+
+            summaries = [
+                run_harness(python, handler, harness_args, optimized)
+                for _ in range(rounds)
+            ]
+            failed = [s for s in summaries if "error" in s]
+            if failed:
+                rows.append({**row, "error": failed[0]["error"]})
+                continue
+
+            rows.append(
+                {
+                    **row,
+                    "errors": max(s["errors"] for s in summaries),
+                    "import_ms": _median(s["import_ms"] for s in summaries),
+                    "p50_ms": _median(s["latency_ms"]["p50"] for s in summaries),
+                    "p90_ms": _median(s["latency_ms"]["p90"] for s in summaries),
+                    "throughput_rps": _median(s["throughput_rps"] for s in summaries),
+                }
+            )
+
+    baseline = next((row["p50_ms"] for row in rows if "p50_ms" in row), None)
+    for row in rows:
+        if baseline and row.get("p50_ms"):
+            row["speedup"] = round(baseline / row["p50_ms"], 2)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.harness.bench",
+        epilog="options after -- are passed to python -m src.harness",
+    )
+    parser.add_argument("handler", help="lambda .py file or zip")
+    parser.add_argument(
+        "--python",
+        action="append",
+        default=[],
+        help="interpreter to compare, repeatable, the first one is the baseline",
+    )
+    parser.add_argument(
+        "--optimize", action="store_true", help="also run with PYTHONOPTIMIZE=1"
+    )
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="JSON rows")
+
+    # Options after "--" are passed to the harness as they are
+    argv = sys.argv[1:] if argv is None else list(argv)
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    harness_args = argv[split + 1 :]
+
+    rows = benchmark(
+        args.handler,
+        args.python or [sys.executable],
+        harness_args,
+        args.rounds,
+        args.optimize,
+    )
+
+    if args.json:
+        print(json.dumps(rows))
+    else:
+        print(
+            f"{'python':<12} {'version':<9} {'-O':<3} {'import ms':>10} "
+            f"{'p50 ms':>9} {'p90 ms':>9} {'req/s':>8} {'speedup':>8}"
+        )
+        for row in rows:
+            head = (
+                f"{row['python']:<12} {row['version'] or '-':<9} "
+                f"{'yes' if row['optimize'] else 'no':<3}"
+            )
+            if "error" in row:
+                print(f"{head} error: {row['error'].splitlines()[-1]}")
+                continue
+            print(
+                f"{head} {row['import_ms']:>10} {row['p50_ms']:>9} "
+                f"{row['p90_ms']:>9} {row['throughput_rps']:>8} "
+                f"{row.get('speedup', '-'):>8}"
+            )
+
+    return 1 if any("error" in row or row["errors"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
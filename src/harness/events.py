@@ -0,0 +1,117 @@
+import json
+import time
+import uuid
+from decimal import Decimal
+
+
+class LambdaContext:
+    """Minimal stand-in of the lambda context object."""
+
+    def __init__(self, function_name="local", timeout=30, memory_size=128):
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.memory_limit_in_mb = memory_size
+        self.invoked_function_arn = (
+            f"arn:aws:lambda:ap-southeast-2:000000000000:function:{function_name}"
+        )
+        self.aws_request_id = str(uuid.uuid4())
+        self.log_group_name = f"/aws/lambda/{function_name}"
+        self.log_stream_name = "local"
+        self._deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def api_event(method="GET", path="/", query=None, body=None, headers=None):
+    """API Gateway REST proxy event (what RESTApi.add_endpoint lambdas get)."""
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers or {},
+        "multiValueHeaders": {k: [v] for k, v in (headers or {}).items()},
+        "queryStringParameters": query or None,
+        "multiValueQueryStringParameters": (
+            {k: [v] for k, v in query.items()} if query else None
+        ),
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": path,
+            "httpMethod": method,
+            "stage": "v1",
+            "requestId": str(uuid.uuid4()),
+            "identity": {"sourceIp": "127.0.0.1", "apiKey": "local"},
+        },
+        "body": body if body is None or isinstance(body, str) else json.dumps(body),
+        "isBase64Encoded": False,
+    }
+
+
+def websocket_event(route="$connect", connection_id=None, body=None):
+    """API Gateway websocket event (DynamoWebsocket manager lambda)."""
+    event_type = {"$connect": "CONNECT", "$disconnect": "DISCONNECT"}.get(
+        route, "MESSAGE"
+    )
+    return {
+        "requestContext": {
+            "routeKey": route,
+            "eventType": event_type,
+            "connectionId": connection_id or str(uuid.uuid4()),
+            "domainName": "local.execute-api.ap-southeast-2.amazonaws.com",
+            "stage": "v1",
+            "requestId": str(uuid.uuid4()),
+        },
+        "body": body if body is None or isinstance(body, str) else json.dumps(body),
+        "isBase64Encoded": False,
+    }
+
+
+def _attribute(value):
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float, Decimal)):
+        return {"N": str(value)}
+    if isinstance(value, dict):
+        return {"M": {k: _attribute(v) for k, v in value.items()}}
+    if isinstance(value, list):
+        return {"L": [_attribute(v) for v in value]}
+    return {"S": str(value)}
+
+
+def stream_event(items, event_name="INSERT", keys=("DeviceID", "Timestamp")):
+    """DynamoDB stream event with NEW_IMAGE records (DynamoWebsocket messager)."""
+    records = []
+    for item in items:
+        image = {k: _attribute(v) for k, v in item.items()}
+        records.append(
+            {
+                "eventID": uuid.uuid4().hex,
+                "eventName": event_name,
+                "eventVersion": "1.1",
+                "eventSource": "aws:dynamodb",
+                "awsRegion": "ap-southeast-2",
+                "dynamodb": {
+                    "Keys": {k: image[k] for k in keys if k in image},
+                    "NewImage": image,
+                    "StreamViewType": "NEW_IMAGE",
+                    "SizeBytes": len(json.dumps(image)),
+                },
+            }
+        )
+    return {"Records": records}
+
+
+def schedule_event(shard=None, shards=None):
+    """EventBridge schedule event, or the shard input of sharded ScheduledLambdas."""
+    if shards:
+        return {"shard": shard, "shards": shards}
+    return {
+        "version": "0",
+        "id": str(uuid.uuid4()),
+        "detail-type": "Scheduled Event",
+        "source": "aws.events",
+        "region": "ap-southeast-2",
+        "detail": {},
+    }
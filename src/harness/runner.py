@@ -0,0 +1,156 @@
+import importlib
+import os
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .events import LambdaContext
+
+CODE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "code")
+
+
+def load_handler(path, environement=None):
+    """Import the handler of a lambda source file or zip.
+
+    Same convention as the constructs: the module is named after the file
+    and exposes `handler`. src/code is put on the path so `helpers` resolve
+    for .py files. Zips are extracted like in /var/task and imported as
+    packaged, with their own helpers and precompiled .pyc.
+    """
+    os.environ.update(environement or {})
+    module_name = os.path.basename(path).split(".")[0]
+    if path.endswith(".zip"):
+        root = tempfile.mkdtemp(prefix=f"{module_name}-")
+        with zipfile.ZipFile(path) as archive:
+            archive.extractall(root)
+        entries = (root,)
+    else:
+        entries = (os.path.abspath(os.path.dirname(path)), CODE_PATH)
+
+    for entry in reversed(entries):
+        if entry in sys.path:
+            sys.path.remove(entry)
+        sys.path.insert(0, entry)
+
+    for name in list(sys.modules):
+        if name in (module_name, "helpers") or name.startswith("helpers."):
+            sys.modules.pop(name)
+    return importlib.import_module(module_name).handler
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+@dataclass
+class LoadResult:
+    requests: int
+    concurrency: int
+    errors: int
+    duration: float
+    latencies: list = field(repr=False)
+    allocated: list = field(repr=False)
+    peaks: list = field(repr=False)
+    first_error: str = None
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        ms = 1000
+        return {
+            "requests": self.requests,
+            "concurrency": self.concurrency,
+            "errors": self.errors,
+            "throughput_rps": (
+                round(self.requests / self.duration, 1) if self.duration else 0.0
+            ),
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50) * ms, 3),
+                "p90": round(_percentile(latencies, 90) * ms, 3),
+                "p99": round(_percentile(latencies, 99) * ms, 3),
+                "max": round(latencies[-1] * ms, 3) if latencies else 0.0,
+            },
+            "first_error": self.first_error,
+            "allocations_kb": {
+                "mean": (
+                    round(sum(self.allocated) / len(self.allocated) / 1024, 1)
+                    if self.allocated
+                    else 0.0
+                ),
+                "peak": round(max(self.peaks) / 1024, 1) if self.peaks else 0.0,
+            },
+        }
+
+
+def _failed(response):
+    return isinstance(response, dict) and response.get("statusCode", 200) >= 500
+
+
+def _invoke(handler, event):
+    """(latency, error): error is the traceback or 5xx response, else None."""
+    start = time.perf_counter()
+    try:
+        response = handler(event, LambdaContext())
+        error = repr(response) if _failed(response) else None
+    except Exception:
+        error = traceback.format_exc()
+    return time.perf_counter() - start, error
+
+
+def measure_allocations(handler, make_event, samples=20):
+    """Bytes allocated (retained) and peak bytes per invocation, sequentially.
+
+    tracemalloc is process wide, so this runs apart from the concurrent
+    load and only on a few samples.
+    """
+    allocated, peaks = [], []
+    tracemalloc.start()
+    try:
+        for i in range(samples):
+            event = make_event(i)
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            _invoke(handler, event)
+            after, peak = tracemalloc.get_traced_memory()
+            allocated.append(max(0, after - before))
+            peaks.append(max(0, peak - before))
+    finally:
+        tracemalloc.stop()
+    return allocated, peaks
+
+
+def run_load(handler, make_event, requests=100, concurrency=4, warmup=5, samples=20):
+    """Invoke handler `requests` times from `concurrency` threads.
+
+    make_event(i) builds the i-th event. The first `warmup` invocations are
+    not measured (imports, clients, caches), like a warm container.
+    """
+    for i in range(warmup):
+        _invoke(handler, make_event(i))
+
+    allocated, peaks = measure_allocations(handler, make_event, samples)
+
+    events = [make_event(i) for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda e: _invoke(handler, e), events))
+    duration = time.perf_counter() - start
+
+    errors = [error for _, error in results if error]
+    return LoadResult(
+        requests=requests,
+        concurrency=concurrency,
+        errors=len(errors),
+        duration=duration,
+        latencies=[latency for latency, _ in results],
+        allocated=allocated,
+        peaks=peaks,
+        first_error=errors[0] if errors else None,
+    )
@@ -0,0 +1,200 @@
+"""In-process stand-ins for the AWS services used by the handlers.
+
+DynamoDB is served by moto when it is installed (`pipenv install --dev`).
+Timestream and the websocket management API are in-memory stand-ins: they
+record what handlers write and post, and Timestream queries return the
+records written so far.
+"""
+
+import contextlib
+import os
+import threading
+from collections import defaultdict
+from unittest import mock
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+try:
+    from moto import mock_aws as _mock
+except ImportError:
+    try:
+        from moto import mock_dynamodb as _mock
+    except ImportError:
+        _mock = None
+
+
+class GoneException(Exception):
+    pass
+
+
+class _Exceptions:
+    GoneException = GoneException
+
+
+class TimestreamStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = defaultdict(list)
+
+
+class TimestreamWrite:
+    def __init__(self, store):
+        self.store = store
+
+    def write_records(self, DatabaseName, TableName, Records, CommonAttributes=None):
+        with self.store.lock:
+            for record in Records:
+                self.store.records[(DatabaseName, TableName)].append(
+                    {**(CommonAttributes or {}), **record}
+                )
+        return {"RecordsIngested": {"Total": len(Records)}}
+
+    def describe_endpoints(self):
+        return {"Endpoints": [{"Address": "local", "CachePeriodInMinutes": 1440}]}
+
+
+class TimestreamQuery:
+    """Every query returns all written records as (time, measure, value, dims)."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def query(self, QueryString, **kwargs):
+        with self.store.lock:
+            records = [r for table in self.store.records.values() for r in table]
+
+        dimensions = sorted(
+            {d["Name"] for r in records for d in r.get("Dimensions", [])}
+        )
+        columns = ["time", "measure_name", "measure_value::double"] + dimensions
+        rows = []
+        for record in records:
+            dims = {d["Name"]: d["Value"] for d in record.get("Dimensions", [])}
+            values = [record.get("Time"), record["MeasureName"], record["MeasureValue"]]
+            values += [dims.get(name) for name in dimensions]
+            rows.append({"Data": [{"ScalarValue": str(v)} for v in values]})
+
+        return {
+            "QueryId": "local",
+            "ColumnInfo": [
+                {"Name": name, "Type": {"ScalarType": "VARCHAR"}} for name in columns
+            ],
+            "Rows": rows,
+        }
+
+    def get_paginator(self, operation):
+        query = self.query
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                yield query(**kwargs)
+
+        return Paginator()
+
+
+class ManagementApi:
+    """apigatewaymanagementapi: records posts, unknown connections are gone."""
+
+    exceptions = _Exceptions
+
+    def __init__(self, connections):
+        self.connections = connections
+        self.lock = threading.Lock()
+        self.posts = defaultdict(list)
+
+    def post_to_connection(self, ConnectionId, Data):
+        if self.connections is not None and ConnectionId not in self.connections:
+            raise GoneException(f"{ConnectionId} is gone")
+        with self.lock:
+            self.posts[ConnectionId].append(Data)
+        return {}
+
+    def get_connection(self, ConnectionId):
+        if self.connections is not None and ConnectionId not in self.connections:
+            raise GoneException(f"{ConnectionId} is gone")
+        return {"ConnectedAt": 0, "LastActiveAt": 0}
+
+    def delete_connection(self, ConnectionId):
+        if self.connections is not None:
+            self.connections.discard(ConnectionId)
+        return {}
+
+
+class StandIns:
+    """Patches boto3 so handlers get the stand-ins.
+
+    tables: {name: (hash_key, range_key or None)} created in moto.
+    live_connections: connection ids the management api accepts, None
+    accepts all of them.
+    """
+
+    def __init__(self, tables=None, live_connections=None):
+        self.tables = tables or {}
+        self.timestream = TimestreamStore()
+        self.management = ManagementApi(live_connections)
+
+    def client_for(self, service):
+        if service == "timestream-write":
+            return TimestreamWrite(self.timestream)
+        if service == "timestream-query":
+            return TimestreamQuery(self.timestream)
+        if service == "apigatewaymanagementapi":
+            return self.management
+        return None
+
+    def _create_tables(self):
+        dynamodb = boto3.client("dynamodb", region_name=os.environ["REGION"])
+        for name, (hash_key, range_key) in self.tables.items():
+            keys = [{"AttributeName": hash_key, "KeyType": "HASH"}]
+            attributes = [{"AttributeName": hash_key, "AttributeType": "S"}]
+            if range_key:
+                keys.append({"AttributeName": range_key, "KeyType": "RANGE"})
+                attributes.append({"AttributeName": range_key, "AttributeType": "N"})
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=keys,
+                AttributeDefinitions=attributes,
+                BillingMode="PAY_PER_REQUEST",
+            )
+
+    @contextlib.contextmanager
+    def active(self):
+        """Route the boto3 clients of the handlers to the stand-ins.
+
+        The environment (credentials, region and anything the handlers set)
+        and boto3 are restored on exit.
+        """
+        if boto3 is None:
+            raise ImportError("boto3 is required to run the handlers locally")
+
+        session_client = boto3.session.Session.client
+        standins = self
+
+        def client(session, service_name, *args, **kwargs):
+            return standins.client_for(service_name) or session_client(
+                session, service_name, *args, **kwargs
+            )
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(mock.patch.dict(os.environ))
+            os.environ.setdefault("REGION", "ap-southeast-2")
+            os.environ.setdefault("AWS_DEFAULT_REGION", os.environ["REGION"])
+            # Never reach a real account
+            os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+            os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+
+            # Other AWS calls also go to moto, never to the account
+            if _mock is not None:
+                stack.enter_context(_mock())
+            elif self.tables:
+                raise ImportError("moto is required for DynamoDB tables")
+            self._create_tables()
+
+            stack.callback(setattr, boto3, "DEFAULT_SESSION", boto3.DEFAULT_SESSION)
+            boto3.session.Session.client = client
+            boto3.DEFAULT_SESSION = None
+            stack.callback(setattr, boto3.session.Session, "client", session_client)
+            yield self
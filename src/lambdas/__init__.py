@@ -1 +1,4 @@
 from .lambdas import ScheduledLambdas, InvokableLambdas
+from .warmup import Warmer
+from .runtime import lambda_runtime, tuning_environement, PYTHON_RUNTIMES
+from .logs import check_retention, logging_environement, RETENTION_DAYS
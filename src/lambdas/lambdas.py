@@ -1,5 +1,7 @@
 import hashlib
+import json
 from constructs import Construct
+from cdktf_cdktf_provider_aws.iam_policy import IamPolicy
 from cdktf_cdktf_provider_aws.iam_role import IamRole
 from cdktf_cdktf_provider_aws.data_aws_iam_policy_document import (
     DataAwsIamPolicyDocument,
@@ -9,6 +11,14 @@ from cdktf_cdktf_provider_aws.lambda_permission import LambdaPermission
 from cdktf_cdktf_provider_aws.cloudwatch_log_group import CloudwatchLogGroup
 from cdktf_cdktf_provider_aws.cloudwatch_event_rule import CloudwatchEventRule
 from cdktf_cdktf_provider_aws.cloudwatch_event_target import CloudwatchEventTarget
+from cdktf_cdktf_provider_aws.dynamodb_table import DynamodbTable
+
+from .logs import check_retention, logging_environement
+from .runtime import lambda_runtime, tuning_environement
+from .warmup import Warmer
+
+# EventBridge limit of targets per rule
+MAX_RULE_TARGETS = 5
 
 
 class ScheduledLambdas(Construct):
@@ -24,9 +34,87 @@ class ScheduledLambdas(Construct):
         timeout: int,
         environement: dict,
         tags: dict,
+        tracing: bool = False,
+        shards: int = 1,
+        checkpoint: bool = False,
+        runtime: str = None,
+        optimize: bool = False,
+        log_retention: int = 30,
+        log_level: str = "INFO",
+        log_format: str = "TEXT",
     ):
+        """Lambda function scheduled by event bridge
+
+        With shards > 1, every schedule tick invokes the function once per
+        shard with {"shard": i, "shards": shards} as event, so the work can
+        be split and run in parallel. With checkpoint, a table keyed by
+        DeviceID is created to record where each device stopped
+        (CHECKPOINT_TABLE_NAME).
+
+        runtime defaults to the lambdaRuntime context, optimize sets
+        PYTHONOPTIMIZE (see lambda_runtime and tuning_environement).
+        log_level and log_format are passed as LOG_LEVEL and LOG_FORMAT
+        for helpers.logs, log_retention is in days.
+
+        Resources:
+        ----------
+            if checkpoint: DynamodbTable and IamPolicy for checkpoints
+            IamRole: Role for the lambda
+            LambdaFunction: The lambda function
+            CloudwatchLogGroup: Logs for the lambda
+            CloudwatchEventRule: Schedule, one per 5 shards
+            CloudwatchEventTarget: One per shard
+            LambdaPermission: Allow execution from each rule
+        """
         super().__init__(scope, id)
 
+        if shards < 1:
+            raise ValueError("Shards must be at least 1")
+
+        if tracing:
+            policies = policies + ["arn:aws:iam::aws:policy/AWSXRayDaemonWriteAccess"]
+
+        self.checkpoint_table_name = None
+        if checkpoint:
+            checkpoint_table = DynamodbTable(
+                self,
+                "checkpoint",
+                name=f"Checkpoint-{name}-{tags['project']}-{tags['env']}",
+                billing_mode="PAY_PER_REQUEST",
+                hash_key="DeviceID",
+                attribute=[dict(name="DeviceID", type="S")],
+                tags=tags,
+            )
+
+            checkpoint_policy = IamPolicy(
+                self,
+                "checkpoint-policy",
+                name=f"{checkpoint_table.name}-RW",
+                policy=json.dumps(
+                    {
+                        "Version": "2012-10-17",
+                        "Statement": [
+                            {
+                                "Action": [
+                                    "dynamodb:BatchGetItem",
+                                    "dynamodb:BatchWriteItem",
+                                    "dynamodb:GetItem",
+                                    "dynamodb:PutItem",
+                                    "dynamodb:UpdateItem",
+                                ],
+                                "Resource": [checkpoint_table.arn],
+                                "Effect": "Allow",
+                            }
+                        ],
+                    }
+                ),
+                tags=tags,
+            )
+
+            policies = policies + [checkpoint_policy.arn]
+            environement.update({"CHECKPOINT_TABLE_NAME": checkpoint_table.name})
+            self.checkpoint_table_name = checkpoint_table.name
+
         assume = DataAwsIamPolicyDocument(
             self,
             "assume",
@@ -63,7 +151,13 @@ class ScheduledLambdas(Construct):
                 chunk = file.read(1024)
                 h.update(chunk) """
 
-        environement.update({"REGION": "ap-southeast-2"})
+        environement.update(
+            {
+                "REGION": "ap-southeast-2",
+                **tuning_environement(optimize),
+                **logging_environement(log_level, log_format),
+            }
+        )
         function = LambdaFunction(
             self,
             f"lambda",
@@ -73,10 +167,11 @@ class ScheduledLambdas(Construct):
             # source_code_hash=h.hexdigest(),
             role=role.arn,
             handler=f"{filename.split('/')[-1].split('.')[0]}.handler",
-            runtime="python3.9",
+            runtime=lambda_runtime(self, runtime),
             memory_size=memory_size,
             timeout=timeout,
             environment={"variables": environement},
+            tracing_config={"mode": "Active"} if tracing else None,
             tags=tags,
         )
 
@@ -84,28 +179,42 @@ class ScheduledLambdas(Construct):
             self,
             f"logs",
             name=f"/aws/lambda/{function.function_name}",
-            retention_in_days=30,
+            retention_in_days=check_retention(log_retention),
             tags=tags,
         )
 
-        schedule = CloudwatchEventRule(
-            self,
-            "rule",
-            name=f"{name}-Schedule",
-            schedule_expression=schedule_expression,
-        )
+        # First rule, target and permission keep their unsharded ids
+        for group, first in enumerate(range(0, shards, MAX_RULE_TARGETS)):
+            rule_suffix = f"-{group}" if group else ""
+            schedule = CloudwatchEventRule(
+                self,
+                f"rule{rule_suffix}",
+                name=f"{name}-Schedule{rule_suffix}",
+                schedule_expression=schedule_expression,
+            )
 
-        CloudwatchEventTarget(self, "target", rule=schedule.name, arn=function.arn)
+            for shard in range(first, min(first + MAX_RULE_TARGETS, shards)):
+                CloudwatchEventTarget(
+                    self,
+                    f"target-{shard}" if shard else "target",
+                    rule=schedule.name,
+                    arn=function.arn,
+                    input=(
+                        json.dumps({"shard": shard, "shards": shards})
+                        if shards > 1
+                        else None
+                    ),
+                )
 
-        LambdaPermission(
-            self,
-            "permission",
-            statement_id="AllowExecutionFromCloudWatch",
-            action="lambda:InvokeFunction",
-            function_name=function.function_name,
-            principal="events.amazonaws.com",
-            source_arn=schedule.arn,
-        )
+            LambdaPermission(
+                self,
+                f"permission{rule_suffix}",
+                statement_id=f"AllowExecutionFromCloudWatch{rule_suffix}",
+                action="lambda:InvokeFunction",
+                function_name=function.function_name,
+                principal="events.amazonaws.com",
+                source_arn=schedule.arn,
+            )
 
 
 class InvokableLambdas(Construct):
@@ -122,9 +231,34 @@ class InvokableLambdas(Construct):
         timeout: int,
         environement: dict,
         tags: dict,
+        tracing: bool = False,
+        warm_concurrency: int = 0,
+        warm_schedule: str = "rate(5 minutes)",
+        runtime: str = None,
+        optimize: bool = False,
+        log_retention: int = 30,
+        log_level: str = "INFO",
+        log_format: str = "TEXT",
     ):
+        """Lambda function invoked by another service
+
+        With warm_concurrency > 0, a Warmer keeps that many containers warm
+        on warm_schedule (see helpers.warmup). runtime, optimize and log
+        settings as for ScheduledLambdas.
+
+        Resources:
+        ----------
+            IamRole: Role for the lambda
+            LambdaFunction: The lambda function
+            CloudwatchLogGroup: Logs for the lambda
+            LambdaPermission: Allow execution from invoke_principal
+            if warm_concurrency: Warmer
+        """
         super().__init__(scope, id)
 
+        if tracing:
+            policies = policies + ["arn:aws:iam::aws:policy/AWSXRayDaemonWriteAccess"]
+
         assume = DataAwsIamPolicyDocument(
             self,
             "assume",
@@ -161,7 +295,13 @@ class InvokableLambdas(Construct):
                 chunk = file.read(1024)
                 h.update(chunk) """
 
-        environement.update({"REGION": "ap-southeast-2"})
+        environement.update(
+            {
+                "REGION": "ap-southeast-2",
+                **tuning_environement(optimize),
+                **logging_environement(log_level, log_format),
+            }
+        )
         function = LambdaFunction(
             self,
             f"lambda",
@@ -171,10 +311,11 @@ class InvokableLambdas(Construct):
             # source_code_hash=h.hexdigest(),
             role=role.arn,
             handler=f"{filename.split('/')[-1].split('.')[0]}.handler",
-            runtime="python3.9",
+            runtime=lambda_runtime(self, runtime),
             memory_size=memory_size,
             timeout=timeout,
             environment={"variables": environement},
+            tracing_config={"mode": "Active"} if tracing else None,
             tags=tags,
         )
 
@@ -182,7 +323,7 @@ class InvokableLambdas(Construct):
             self,
             f"logs",
             name=f"/aws/lambda/{function.function_name}",
-            retention_in_days=30,
+            retention_in_days=check_retention(log_retention),
             tags=tags,
         )
 
@@ -195,3 +336,15 @@ class InvokableLambdas(Construct):
             principal=invoke_principal,
             source_arn=invoke_from_arn,
         )
+
+        if warm_concurrency:
+            Warmer(
+                self,
+                "warmer",
+                function_name=function.function_name,
+                function_arn=function.arn,
+                role_name=role.name,
+                concurrency=warm_concurrency,
+                schedule_expression=warm_schedule,
+                tags=tags,
+            )
@@ -0,0 +1,31 @@
+# Values accepted by CloudWatch for retention_in_days (0 never expires)
+RETENTION_DAYS = (
+    0, 1, 3, 5, 7, 14, 30, 60, 90, 120, 150, 180, 365, 400, 545, 731,
+    1096, 1827, 2192, 2557, 2922, 3288, 3653,
+)  # fmt: skip
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+LOG_FORMATS = ("TEXT", "JSON")
+
+
+def check_retention(days: int) -> int:
+    """Check a log group retention, in days."""
+    if days not in RETENTION_DAYS:
+        raise ValueError(
+            f"Unsupported log retention {days}, use one of "
+            f"{', '.join(str(d) for d in RETENTION_DAYS)}"
+        )
+    return days
+
+
+def logging_environement(log_level: str, log_format: str) -> dict:
+    """LOG_LEVEL and LOG_FORMAT of a lambda, read by helpers.logs.
+
+    The AWS provider 4.x has no logging_config on LambdaFunction, the
+    level and format are applied by the handler.
+    """
+    log_level, log_format = log_level.upper(), log_format.upper()
+    if log_level not in LOG_LEVELS:
+        raise ValueError(f"Unsupported log level '{log_level}'")
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unsupported log format '{log_format}'")
+    return {"LOG_LEVEL": log_level, "LOG_FORMAT": log_format}
@@ -0,0 +1,30 @@
+from constructs import Construct
+
+# Python runtimes accepted by the locked provider (cdktf-cdktf-provider-aws
+# 19.x, AWS provider 5.99)
+PYTHON_RUNTIMES = ("python3.9", "python3.10", "python3.11", "python3.12", "python3.13")
+DEFAULT_RUNTIME = "python3.9"
+
+
+def lambda_runtime(scope: Construct, runtime: str = None) -> str:
+    """Runtime of a lambda of scope.
+
+    runtime if given, else the "lambdaRuntime" context of the app
+    (cdktf.json), else python3.9.
+    """
+    runtime = runtime or scope.node.try_get_context("lambdaRuntime") or DEFAULT_RUNTIME
+    if runtime not in PYTHON_RUNTIMES:
+        raise ValueError(
+            f"Unsupported lambda runtime '{runtime}', "
+            f"use one of {', '.join(PYTHON_RUNTIMES)}"
+        )
+    return runtime
+
+
+def tuning_environement(optimize: bool) -> dict:
+    """Interpreter environement variables of a lambda.
+
+    PYTHONOPTIMIZE=1 strips asserts and __debug__ blocks, and loads the
+    .opt-1.pyc precompiled by `make zip_lambdas PRECOMPILE=...`.
+    """
+    return {"PYTHONOPTIMIZE": "1"} if optimize else {}
@@ -0,0 +1,119 @@
+import json
+from constructs import Construct
+from cdktf import Fn, Op, Token
+from cdktf_cdktf_provider_aws.iam_role_policy import IamRolePolicy
+from cdktf_cdktf_provider_aws.lambda_permission import LambdaPermission
+from cdktf_cdktf_provider_aws.cloudwatch_event_rule import CloudwatchEventRule
+from cdktf_cdktf_provider_aws.cloudwatch_event_target import CloudwatchEventTarget
+
+# Lambda burst of concurrent containers one warm-up may ask for
+MAX_WARM_CONCURRENCY = 50
+
+# EventBridge rule names are at most 64 characters
+RULE_SUFFIX = "-Warmer"
+RULE_NAME_LENGTH = 64
+
+
+def rule_name(function_name: str) -> str:
+    """`<function_name>-Warmer`, at most 64 characters.
+
+    The function name is a token, so the name is resolved by Terraform.
+    Longer names keep the start of the function name and 8 characters of
+    its sha1, so two long names with the same start do not collide.
+    """
+    # Room left for "-" and the hash
+    short = RULE_NAME_LENGTH - len(RULE_SUFFIX) - 1 - 8
+    return Token.as_string(
+        Fn.conditional(
+            Op.lte(Fn.length_of(function_name), RULE_NAME_LENGTH - len(RULE_SUFFIX)),
+            f"{function_name}{RULE_SUFFIX}",
+            Fn.format(
+                f"%s-%s{RULE_SUFFIX}",
+                [
+                    Fn.substr(function_name, 0, short),
+                    Fn.substr(Fn.sha1(function_name), 0, 8),
+                ],
+            ),
+        )
+    )
+
+
+class Warmer(Construct):
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        function_name: str,
+        function_arn: str,
+        role_name: str,
+        concurrency: int,
+        schedule_expression: str,
+        tags: dict,
+    ):
+        """Keep `concurrency` containers of a lambda warm
+
+        The rule sends {"warmer": true, "concurrency": N} to the function on
+        every tick. helpers.warmup.is_warmup fans it out to N - 1 concurrent
+        self invocations, so N containers stay busy at the same time and
+        none of them is reused for another ping.
+
+        Resources:
+        ----------
+            CloudwatchEventRule: Warm-up schedule, named <function_name>-Warmer
+                (shortened with a hash past 64 characters)
+            CloudwatchEventTarget: The function, with the warm-up event
+            LambdaPermission: Allow execution from the rule
+            if concurrency > 1: IamRolePolicy allowing the function to invoke itself
+        """
+        super().__init__(scope, id)
+
+        if not 1 <= concurrency <= MAX_WARM_CONCURRENCY:
+            raise ValueError(
+                f"Warm concurrency must be between 1 and {MAX_WARM_CONCURRENCY}"
+            )
+
+        rule = CloudwatchEventRule(
+            self,
+            "rule",
+            name=rule_name(function_name),
+            schedule_expression=schedule_expression,
+            tags=tags,
+        )
+
+        CloudwatchEventTarget(
+            self,
+            "target",
+            rule=rule.name,
+            arn=function_arn,
+            input=json.dumps({"warmer": True, "concurrency": concurrency}),
+        )
+
+        LambdaPermission(
+            self,
+            "permission",
+            statement_id="AllowExecutionFromWarmer",
+            action="lambda:InvokeFunction",
+            function_name=function_name,
+            principal="events.amazonaws.com",
+            source_arn=rule.arn,
+        )
+
+        if concurrency > 1:
+            IamRolePolicy(
+                self,
+                "fanout",
+                name="WarmerFanOut",
+                role=role_name,
+                policy=json.dumps(
+                    {
+                        "Version": "2012-10-17",
+                        "Statement": [
+                            {
+                                "Action": ["lambda:InvokeFunction"],
+                                "Resource": [function_arn],
+                                "Effect": "Allow",
+                            }
+                        ],
+                    }
+                ),
+            )
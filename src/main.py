@@ -3,8 +3,7 @@ import json
 import os
 from dotenv import load_dotenv
 from constructs import Construct
-from cdktf import App, TerraformStack, S3Backend
-from cdktf_cdktf_provider_aws.provider import AwsProvider
+from cdktf import App
 from cdktf_cdktf_provider_aws.iam_policy import IamPolicy
 from cdktf_cdktf_provider_aws.iam_role import IamRole
 from cdktf_cdktf_provider_aws.data_aws_iam_policy_document import (
@@ -18,28 +17,76 @@ from src.dynamo import DynamoDB
 from src.api import RESTApi
 from src.timestream import Timestream
 from src.lambdas import ScheduledLambdas, InvokableLambdas
+from src.config import load_spec, build_app
+from src.stacks import ProjectStack, DataStack, StreamingStack, ComputeStack, ApiStack
 
 load_dotenv()
 
 
-class MyStack(TerraformStack):
+class MyStack(ProjectStack):
     def __init__(self, scope: Construct, ns: str, env: str, project_owner: str):
-        super().__init__(scope, ns)
+        super().__init__(
+            scope, ns, ns, env, project_owner, state_key=f"{ns}/terraform-{env}.tfstate"
+        )
 
-        tags = {"env": env, "project": ns, "project_owner": project_owner}
+        tags = self.tags
 
-        AwsProvider(self, "AWS", region="ap-southeast-2", profile="unsw")
 
-        # Backend for storing state
-        S3Backend(
-            self,
-            bucket="terraform-backend-faic-infra",
-            key=f"{ns}/terraform-{env}.tfstate",
-            region="ap-southeast-2",
-        )
+def split_stacks(scope: Construct, project: str, env: str, project_owner: str):
+    """Same project split in data, streaming, compute and api stacks.
+
+    Each stack has its own state, a change in one of them only refreshes
+    its own resources. Values passed between stacks become cross-stack
+    outputs.
+    """
+    data = DataStack(
+        scope,
+        project,
+        env,
+        project_owner,
+        isstream=True,
+        timestream_tables=[f"{project}_api"],
+    )
+    StreamingStack(scope, project, env, project_owner, data)
+
+    # Lambdas go in compute, their policies and tables come from data
+    compute = ComputeStack(scope, project, env, project_owner)
+    table_name, crud_arn = data.tables[f"{project}_api"]
+    ScheduledLambdas(
+        compute,
+        "fetch",
+        name=f"{project}-fetch",
+        schedule_expression="rate(1 minute)",
+        filename="./src/code/archived/brewai_fetch.zip",
+        policies=[crud_arn],
+        memory_size=256,
+        timeout=50,
+        environement={
+            "DATABASE_NAME": data.timestream.db_name,
+            "TABLE_NAME": table_name,
+        },
+        tags=compute.tags,
+    )
+
+    # Endpoints go in api.api, then finalize
+    api = ApiStack(scope, project, env, project_owner, endpoint_name=project)
+    api.api.add_endpoint(
+        http="GET",
+        policies=[data.dynamo.crud_arn],
+        filename="./src/code/archived/table_get.zip",
+        environement={"TABLE_NAME": data.dynamo.table_name},
+    )
+    api.api.finalize()
 
 
 app = App()
-MyStack(app, "mysatck", "dev", "me")
+
+# Build from a declarative spec when STACK_CONFIG is set (see docs/modules/config.md)
+if os.getenv("STACK_CONFIG"):
+    build_app(app, load_spec(os.getenv("STACK_CONFIG")))
+elif os.getenv("SPLIT_STACKS"):
+    split_stacks(app, "mysatck", "dev", "me")
+else:
+    MyStack(app, "mysatck", "dev", "me")
 
 app.synth()
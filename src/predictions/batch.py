@@ -0,0 +1,445 @@
+import json
+import re
+from constructs import Construct
+from cdktf import TerraformOutput
+from cdktf_cdktf_provider_aws.data_aws_iam_policy_document import (
+    DataAwsIamPolicyDocument,
+)
+from cdktf_cdktf_provider_aws.data_aws_caller_identity import DataAwsCallerIdentity
+from cdktf_cdktf_provider_aws.iam_policy import IamPolicy
+from cdktf_cdktf_provider_aws.iam_role import IamRole
+from cdktf_cdktf_provider_aws.s3_bucket import S3Bucket
+from cdktf_cdktf_provider_aws.s3_bucket_public_access_block import (
+    S3BucketPublicAccessBlock,
+)
+from cdktf_cdktf_provider_aws.s3_bucket_lifecycle_configuration import (
+    S3BucketLifecycleConfiguration,
+)
+from cdktf_cdktf_provider_aws.lambda_function import LambdaFunction
+from cdktf_cdktf_provider_aws.cloudwatch_log_group import CloudwatchLogGroup
+from cdktf_cdktf_provider_aws.sfn_state_machine import SfnStateMachine
+
+from src.lambdas import (
+    check_retention,
+    lambda_runtime,
+    logging_environement,
+    tuning_environement,
+)
+
+# Duration limit of an Express workflow, each window runs in one
+EXPRESS_LIMIT = 300
+# Retries of Lambda service errors and throttles: after 1, 2 and 4 seconds
+SERVICE_RETRY = {"IntervalSeconds": 1, "BackoffRate": 2, "MaxAttempts": 3}
+# Retries of the worker errors: after 5, 10, 20 seconds, ...
+WORKER_RETRY = {"IntervalSeconds": 5, "BackoffRate": 2, "MaxAttempts": 3}
+
+
+def _backoff(retry, attempts):
+    """Seconds waited before the first `attempts` retries."""
+    return sum(
+        retry["IntervalSeconds"] * retry["BackoffRate"] ** i for i in range(attempts)
+    )
+
+
+def worker_retries(timeout: int) -> int:
+    """Retries of a failed window that fit in the Express limit.
+
+    Every attempt can last the whole worker timeout, throttled invocations
+    fail fast and only add their backoff.
+    """
+    budget = EXPRESS_LIMIT - _backoff(SERVICE_RETRY, SERVICE_RETRY["MaxAttempts"])
+    if timeout > budget:
+        raise ValueError(f"Timeout must be at most {budget}s (Express limit)")
+    retries = 0
+    while (
+        retries < WORKER_RETRY["MaxAttempts"]
+        and (retries + 2) * timeout + _backoff(WORKER_RETRY, retries + 1) <= budget
+    ):
+        retries += 1
+    return retries
+
+
+class BatchPredictions(Construct):
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        name: str,
+        planner_filename: str,
+        worker_filename: str,
+        policies: list,
+        environement: dict,
+        tags: dict,
+        max_concurrency: int = 10,
+        batch_size: int = 100,
+        memory_size: int = 512,
+        timeout: int = 60,
+        tracing: bool = False,
+        runtime: str = None,
+        optimize: bool = False,
+        log_retention: int = 30,
+        log_level: str = "INFO",
+        log_format: str = "TEXT",
+        plan_days: int = 7,
+        tolerated_failure_percentage: int = 0,
+    ):
+        """Step Functions pipeline for backfilling predictions
+
+        The planner splits a {devices, start, end} request into
+        device/time windows written to the plan bucket (the state payload
+        is limited to 256 KB), a Distributed Map reads them from S3 and runs
+        one worker per window with at most max_concurrency workers at the
+        same time. Each worker calls the inference endpoint with batch_size
+        timestamps per request and bulk-writes the results. Each window runs
+        in an Express workflow (5 minutes at most), timeout sets how many
+        times a failed window is retried (see worker_retries). The
+        execution fails when more than tolerated_failure_percentage of the
+        windows fail, the failed windows are written under results/ of the
+        bucket. Plans and results expire after plan_days. runtime, optimize
+        and the log settings apply to both lambdas (see
+        src.lambdas.lambda_runtime).
+
+        Resources:
+        ----------
+            S3Bucket: Private bucket of the plans and results, expired after plan_days
+            IamPolicy: Write the plans
+            IamRole: Role for the planner and worker lambdas
+            LambdaFunction: Planner and Worker
+            CloudwatchLogGroup: Logs for lambdas
+            IamPolicy: Invoke lambdas and run child executions
+            IamRole: Role for the state machine
+            SfnStateMachine: The Distributed Map pipeline
+        """
+        super().__init__(scope, id)
+
+        retries = worker_retries(timeout)
+        if not 0 <= tolerated_failure_percentage <= 100:
+            raise ValueError("Tolerated failure percentage must be between 0 and 100")
+
+        suffix = f'-{tags["project"]}-{tags["env"]}'
+        machine_name = f"BatchPredictions-{name}{suffix}"
+
+        account = DataAwsCallerIdentity(self, "current")
+        runtime = lambda_runtime(self, runtime)
+        tuning = {
+            **tuning_environement(optimize),
+            **logging_environement(log_level, log_format),
+        }
+        log_retention = check_retention(log_retention)
+
+        if tracing:
+            policies = policies + ["arn:aws:iam::aws:policy/AWSXRayDaemonWriteAccess"]
+
+        bucket = S3Bucket(
+            self,
+            "bucket",
+            bucket=re.sub(r"[^a-z0-9-]", "-", f"batch-plans-{name}{suffix}".lower()),
+            tags=tags,
+        )
+
+        S3BucketPublicAccessBlock(
+            self,
+            "bucket-private",
+            bucket=bucket.id,
+            block_public_acls=True,
+            block_public_policy=True,
+            ignore_public_acls=True,
+            restrict_public_buckets=True,
+        )
+
+        S3BucketLifecycleConfiguration(
+            self,
+            "bucket-lifecycle",
+            bucket=bucket.id,
+            rule=[
+                {
+                    "id": prefix,
+                    "status": "Enabled",
+                    "filter": [{"prefix": f"{prefix}/"}],
+                    "expiration": [{"days": plan_days}],
+                }
+                for prefix in ("plans", "results")
+            ],
+        )
+
+        plan_policy = IamPolicy(
+            self,
+            "plan-policy",
+            name=f"{machine_name}-PLAN",
+            policy=json.dumps(
+                {
+                    "Version": "2012-10-17",
+                    "Statement": [
+                        {
+                            "Action": ["s3:PutObject"],
+                            "Resource": [f"{bucket.arn}/plans/*"],
+                            "Effect": "Allow",
+                        }
+                    ],
+                }
+            ),
+            tags=tags,
+        )
+
+        assume = DataAwsIamPolicyDocument(
+            self,
+            "assume",
+            statement=[
+                {
+                    "actions": ["sts:AssumeRole"],
+                    "principals": [
+                        {
+                            "type": "Service",
+                            "identifiers": ["lambda.amazonaws.com"],
+                        }
+                    ],
+                }
+            ],
+        )
+
+        role = IamRole(
+            self,
+            "role",
+            name=f"BatchPredictions-{name}{suffix}",
+            assume_role_policy=assume.json,
+            managed_policy_arns=[
+                "arn:aws:iam::092201464628:policy/LambdaLogging",
+                "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                plan_policy.arn,
+            ]
+            + policies,
+            tags=tags,
+        )
+
+        planner = LambdaFunction(
+            self,
+            "planner",
+            filename=planner_filename,
+            function_name=f"{tags['project']}-batch-plan-{name}-{tags['env']}",
+            source_code_hash="1",
+            role=role.arn,
+            handler=f"{planner_filename.split('/')[-1].split('.')[0]}.handler",
+            runtime=runtime,
+            memory_size=128,
+            timeout=10,
+            environment={
+                "variables": {
+                    "REGION": "ap-southeast-2",
+                    "PLAN_BUCKET": bucket.bucket,
+                    **tuning,
+                }
+            },
+            tracing_config={"mode": "Active"} if tracing else None,
+            tags=tags,
+        )
+
+        environement.update(
+            {"REGION": "ap-southeast-2", "BATCH_SIZE": str(batch_size), **tuning}
+        )
+        worker = LambdaFunction(
+            self,
+            "worker",
+            filename=worker_filename,
+            function_name=f"{tags['project']}-batch-predict-{name}-{tags['env']}",
+            source_code_hash="1",
+            role=role.arn,
+            handler=f"{worker_filename.split('/')[-1].split('.')[0]}.handler",
+            runtime=runtime,
+            memory_size=memory_size,
+            timeout=timeout,
+            environment={"variables": environement},
+            tracing_config={"mode": "Active"} if tracing else None,
+            tags=tags,
+        )
+
+        CloudwatchLogGroup(
+            self,
+            "planner-logs",
+            name=f"/aws/lambda/{planner.function_name}",
+            retention_in_days=log_retention,
+            tags=tags,
+        )
+
+        CloudwatchLogGroup(
+            self,
+            "worker-logs",
+            name=f"/aws/lambda/{worker.function_name}",
+            retention_in_days=log_retention,
+            tags=tags,
+        )
+
+        machine_arn = (
+            f"arn:aws:states:ap-southeast-2:{account.account_id}:"
+            f"stateMachine:{machine_name}"
+        )
+        sfn_policy = IamPolicy(
+            self,
+            "sfn-policy",
+            name=f"{machine_name}-RUN",
+            policy=json.dumps(
+                {
+                    "Version": "2012-10-17",
+                    "Statement": [
+                        {
+                            "Action": ["lambda:InvokeFunction"],
+                            "Resource": [planner.arn, worker.arn],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": ["s3:GetObject"],
+                            "Resource": [f"{bucket.arn}/plans/*"],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": [
+                                "s3:PutObject",
+                                "s3:GetObject",
+                                "s3:ListMultipartUploadParts",
+                                "s3:AbortMultipartUpload",
+                            ],
+                            "Resource": [f"{bucket.arn}/results/*"],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": ["states:StartExecution"],
+                            "Resource": [machine_arn],
+                            "Effect": "Allow",
+                        },
+                        {
+                            "Action": [
+                                "states:DescribeExecution",
+                                "states:StopExecution",
+                            ],
+                            "Resource": [
+                                f"arn:aws:states:ap-southeast-2:{account.account_id}:"
+                                f"execution:{machine_name}/*"
+                            ],
+                            "Effect": "Allow",
+                        },
+                    ],
+                }
+            ),
+            tags=tags,
+        )
+
+        sfn_assume = DataAwsIamPolicyDocument(
+            self,
+            "sfn-assume",
+            statement=[
+                {
+                    "actions": ["sts:AssumeRole"],
+                    "principals": [
+                        {
+                            "type": "Service",
+                            "identifiers": ["states.amazonaws.com"],
+                        }
+                    ],
+                }
+            ],
+        )
+
+        sfn_role = IamRole(
+            self,
+            "sfn-role",
+            name=f"StepFunctions-{machine_name}",
+            assume_role_policy=sfn_assume.json,
+            managed_policy_arns=[sfn_policy.arn]
+            + (["arn:aws:iam::aws:policy/AWSXRayDaemonWriteAccess"] if tracing else []),
+            tags=tags,
+        )
+
+        retry = [
+            {
+                "ErrorEquals": [
+                    "Lambda.ServiceException",
+                    "Lambda.TooManyRequestsException",
+                ],
+                **SERVICE_RETRY,
+            }
+        ]
+        # Errors raised by the worker (RuntimeError, HTTPError, timeout, ...)
+        worker_retry = retry + [
+            {
+                "ErrorEquals": ["States.TaskFailed"],
+                **WORKER_RETRY,
+                "MaxAttempts": retries,
+            }
+        ]
+
+        definition = {
+            "Comment": "Plan device/time windows then predict them in parallel",
+            "StartAt": "Plan",
+            "States": {
+                "Plan": {
+                    "Type": "Task",
+                    "Resource": "arn:aws:states:::lambda:invoke",
+                    "Parameters": {
+                        "FunctionName": planner.arn,
+                        "Payload": {
+                            "request.$": "$",
+                            "execution.$": "$$.Execution.Name",
+                        },
+                    },
+                    "ResultSelector": {
+                        "bucket.$": "$.Payload.bucket",
+                        "key.$": "$.Payload.key",
+                        "windows.$": "$.Payload.windows",
+                    },
+                    "Retry": retry,
+                    "Next": "Predict",
+                },
+                "Predict": {
+                    "Type": "Map",
+                    # Windows are read from S3, not from the state payload
+                    "ItemReader": {
+                        "Resource": "arn:aws:states:::s3:getObject",
+                        "ReaderConfig": {"InputType": "JSON"},
+                        "Parameters": {"Bucket.$": "$.bucket", "Key.$": "$.key"},
+                    },
+                    "MaxConcurrency": max_concurrency,
+                    "ToleratedFailurePercentage": tolerated_failure_percentage,
+                    # Failed windows are written to results/<map run>/
+                    "ResultWriter": {
+                        "Resource": "arn:aws:states:::s3:putObject",
+                        "Parameters": {"Bucket": bucket.bucket, "Prefix": "results"},
+                    },
+                    "ItemProcessor": {
+                        "ProcessorConfig": {
+                            "Mode": "DISTRIBUTED",
+                            "ExecutionType": "EXPRESS",
+                        },
+                        "StartAt": "PredictWindow",
+                        "States": {
+                            "PredictWindow": {
+                                "Type": "Task",
+                                "Resource": "arn:aws:states:::lambda:invoke",
+                                "Parameters": {
+                                    "FunctionName": worker.arn,
+                                    "Payload.$": "$",
+                                },
+                                "ResultSelector": {"written.$": "$.Payload.written"},
+                                "Retry": worker_retry,
+                                "End": True,
+                            }
+                        },
+                    },
+                    "ResultPath": None,
+                    "End": True,
+                },
+            },
+        }
+
+        machine = SfnStateMachine(
+            self,
+            "machine",
+            name=machine_name,
+            role_arn=sfn_role.arn,
+            definition=json.dumps(definition),
+            tracing_configuration={"enabled": tracing},
+            tags=tags,
+        )
+
+        TerraformOutput(self, "state_machine_arn", value=machine.arn)
+        self.state_machine_arn = machine.arn
+        self.worker_arn = worker.arn
+        self.bucket_name = bucket.bucket
@@ -0,0 +1 @@
+from .stacks import ProjectStack, DataStack, StreamingStack, ComputeStack, ApiStack
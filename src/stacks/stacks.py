@@ -0,0 +1,140 @@
+from constructs import Construct
+from cdktf import TerraformStack, S3Backend
+from cdktf_cdktf_provider_aws.provider import AwsProvider
+
+from src.dynamo import DynamoDB
+from src.api import RESTApi
+from src.timestream import Timestream
+from src.streaming import DynamoWebsocket
+
+
+class ProjectStack(TerraformStack):
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        project: str,
+        env: str,
+        project_owner: str,
+        state_key: str = None,
+    ):
+        """Stack with the project provider, tags and S3 backend
+
+        Each stack has its own state file, by default
+        {project}/{id}/terraform-{env}.tfstate.
+        """
+        super().__init__(scope, id)
+
+        self.tags = {"env": env, "project": project, "project_owner": project_owner}
+
+        AwsProvider(self, "AWS", region="ap-southeast-2", profile="unsw")
+
+        # Backend for storing state
+        S3Backend(
+            self,
+            bucket="terraform-backend-faic-infra",
+            key=state_key or f"{project}/{id}/terraform-{env}.tfstate",
+            region="ap-southeast-2",
+        )
+
+
+class DataStack(ProjectStack):
+    def __init__(
+        self,
+        scope: Construct,
+        project: str,
+        env: str,
+        project_owner: str,
+        isstream: bool = False,
+        timestream_tables: list = None,
+        point_in_time_recovery: bool = False,
+    ):
+        """DynamoDB table and Timestream database
+
+        The websocket of the table stream is not built here, see
+        StreamingStack.
+
+        Attributes:
+        ----------
+            dynamo: The DynamoDB construct
+            timestream: The Timestream construct
+            tables: {table: (table_name, crud_arn)} of the Timestream tables
+        """
+        super().__init__(scope, f"{project}-data", project, env, project_owner)
+
+        self.dynamo = DynamoDB(
+            self,
+            "dynamo",
+            isstream=isstream,
+            tags=self.tags,
+            websocket=False,
+            point_in_time_recovery=point_in_time_recovery,
+        )
+
+        self.timestream = Timestream(self, "timestream", tags=self.tags)
+        self.tables = {
+            table: self.timestream.add_table(table) for table in timestream_tables or []
+        }
+
+
+class StreamingStack(ProjectStack):
+    def __init__(
+        self,
+        scope: Construct,
+        project: str,
+        env: str,
+        project_owner: str,
+        data: DataStack,
+        tracing: bool = False,
+        connection_ttl: int = 3600,
+        sweeper_filename: str = None,
+    ):
+        """Websocket API on the stream of the DataStack table"""
+        if data.dynamo.stream_arn is None:
+            raise ValueError("StreamingStack needs a DataStack with isstream=True")
+
+        super().__init__(scope, f"{project}-streaming", project, env, project_owner)
+
+        self.websocket = DynamoWebsocket(
+            self,
+            "websocket-stream",
+            data.dynamo.stream_arn,
+            data.dynamo.stream_policy_arn,
+            tags=self.tags,
+            tracing=tracing,
+            connection_ttl=connection_ttl,
+            sweeper_filename=sweeper_filename,
+        )
+
+
+class ComputeStack(ProjectStack):
+    def __init__(
+        self,
+        scope: Construct,
+        project: str,
+        env: str,
+        project_owner: str,
+    ):
+        """Stack for ScheduledLambdas, InvokableLambdas, BatchPredictions etc.
+
+        Create the lambdas with this stack as scope.
+        """
+        super().__init__(scope, f"{project}-compute", project, env, project_owner)
+
+
+class ApiStack(ProjectStack):
+    def __init__(
+        self,
+        scope: Construct,
+        project: str,
+        env: str,
+        project_owner: str,
+        endpoint_name: str,
+        tracing: bool = False,
+    ):
+        """REST API, add endpoints with self.api then call self.api.finalize()"""
+        super().__init__(scope, f"{project}-api", project, env, project_owner)
+
+        self.api = RESTApi(
+            self, "api", endpoint_name=endpoint_name, tags=self.tags, tracing=tracing
+        )
@@ -20,6 +20,15 @@ from cdktf_cdktf_provider_aws.apigatewayv2_route import Apigatewayv2Route
 from cdktf_cdktf_provider_aws.apigatewayv2_integration import Apigatewayv2Integration
 from cdktf_cdktf_provider_aws.apigatewayv2_stage import Apigatewayv2Stage
 from cdktf_cdktf_provider_aws.apigatewayv2_deployment import Apigatewayv2Deployment
+from cdktf_cdktf_provider_aws.cloudwatch_event_rule import CloudwatchEventRule
+from cdktf_cdktf_provider_aws.cloudwatch_event_target import CloudwatchEventTarget
+
+from src.lambdas import (
+    check_retention,
+    lambda_runtime,
+    logging_environement,
+    tuning_environement,
+)
 
 
 class DynamoWebsocket(Construct):
@@ -30,9 +39,24 @@ class DynamoWebsocket(Construct):
         stream_arn: str,
         stream_policy_arn: str,
         tags: dict,
+        tracing: bool = False,
+        connection_ttl: int = 3600,
+        sweeper_filename: str = None,
+        sweep_schedule: str = "rate(15 minutes)",
+        runtime: str = None,
+        optimize: bool = False,
+        log_retention: int = 30,
+        log_level: str = "INFO",
+        log_format: str = "TEXT",
     ):
         """Resources for websocket API associated to a dynamo table
 
+        Connections expire connection_ttl seconds after their last
+        heartbeat (DynamoDB TTL on expiresAt). With sweeper_filename, a
+        scheduled lambda also deletes expired and gone connections, so
+        broadcasts only read live ones. runtime and optimize apply to every
+        lambda (see src.lambdas.lambda_runtime), so do the log settings.
+
         Resources:
         ----------
             DynamodbTable: The table for managing open connections
@@ -43,14 +67,25 @@ class DynamoWebsocket(Construct):
             LambdaPermission: Allow execution from api
             CloudwatchLogGroup: Logs for lambdas
             Apigatewayv2Integration: API Integration
-            Apigatewayv2Route: connect and disconnect routes
+            Apigatewayv2Route: connect, disconnect and heartbeat routes
             Apigatewayv2Deployment: API deployement
             Apigatewayv2Stage: API version
             LambdaEventSourceMapping: Connect lambdas to stream
+            if sweeper_filename: Sweeper lambda, role, logs and schedule
         """
         super().__init__(scope, id)
 
         suffix = f'-{tags["project"]}-{tags["env"]}'
+        tracing_policies = (
+            ["arn:aws:iam::aws:policy/AWSXRayDaemonWriteAccess"] if tracing else []
+        )
+        tracing_config = {"mode": "Active"} if tracing else None
+        runtime = lambda_runtime(self, runtime)
+        tuning = {
+            **tuning_environement(optimize),
+            **logging_environement(log_level, log_format),
+        }
+        log_retention = check_retention(log_retention)
 
         account = DataAwsCallerIdentity(self, "current")
 
@@ -63,6 +98,7 @@ class DynamoWebsocket(Construct):
             write_capacity=1,
             hash_key="connectionId",
             attribute=[dict(name="connectionId", type="S")],
+            ttl={"attribute_name": "expiresAt", "enabled": True},
             tags=tags,
         )
 
@@ -153,7 +189,8 @@ class DynamoWebsocket(Construct):
                 "arn:aws:iam::092201464628:policy/LambdaLogging",
                 conn_policy.arn,
                 "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
-            ],
+            ]
+            + tracing_policies,
             tags=tags,
         )
 
@@ -175,15 +212,18 @@ class DynamoWebsocket(Construct):
             source_code_hash=h.hexdigest(),
             role=manage_role.arn,
             handler="manage_conn.handler",
-            runtime="python3.9",
+            runtime=runtime,
             memory_size=128,
             timeout=5,
             environment={
                 "variables": {
                     "REGION": "ap-southeast-2",
                     "CONNECTION_TABLE_NAME": conn_table.name,
+                    "CONNECTION_TTL": str(connection_ttl),
+                    **tuning,
                 }
             },
+            tracing_config=tracing_config,
             tags=tags,
         )
 
@@ -201,7 +241,7 @@ class DynamoWebsocket(Construct):
             self,
             "manage_logs",
             name=f"/aws/lambda/{manage_func.function_name}",
-            retention_in_days=30,
+            retention_in_days=log_retention,
             tags=tags,
         )
 
@@ -239,12 +279,32 @@ class DynamoWebsocket(Construct):
             route_key="$disconnect",
         )
 
+        heartbeat_integration = Apigatewayv2Integration(
+            self,
+            "heartbeat-inte",
+            api_id=websocket.id,
+            integration_type="AWS_PROXY",
+            integration_method="POST",
+            integration_uri=manage_func.invoke_arn,
+        )
+
+        # Clients send {"action": "heartbeat"} to refresh their expiresAt
+        heartbeat_route = Apigatewayv2Route(
+            self,
+            "route-heartbeat",
+            api_id=websocket.id,
+            target=f"integrations/{heartbeat_integration.id}",
+            route_key="heartbeat",
+        )
+
+        routes = [connect_route, disconnect_route, heartbeat_route]
         dep = Apigatewayv2Deployment(
             self,
             "dep",
             api_id=websocket.id,
             lifecycle={"create_before_destroy": True},
-            depends_on=[connect_route, disconnect_route],
+            triggers={"routes": ",".join(route.id for route in routes)},
+            depends_on=routes,
         )
 
         stage = Apigatewayv2Stage(
@@ -267,7 +327,8 @@ class DynamoWebsocket(Construct):
                 stream_policy_arn,
                 "arn:aws:iam::092201464628:policy/LambdaLogging",
                 "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
-            ],
+            ]
+            + tracing_policies,
             tags=tags,
         )
 
@@ -289,15 +350,18 @@ class DynamoWebsocket(Construct):
             source_code_hash=h2.hexdigest(),
             role=msg_role.arn,
             handler="msg_conn.handler",
-            runtime="python3.9",
+            runtime=runtime,
             memory_size=128,
             timeout=20,
             environment={
                 "variables": {
                     "REGION": "ap-southeast-2",
                     "CONNECTION_TABLE_NAME": conn_table.name,
+                    "CONNECTION_TTL": str(connection_ttl),
+                    **tuning,
                 }
             },
+            tracing_config=tracing_config,
             tags=tags,
         )
 
@@ -313,8 +377,97 @@ class DynamoWebsocket(Construct):
             self,
             "msg_logs",
             name=f"/aws/lambda/{msg_func.function_name}",
-            retention_in_days=30,
+            retention_in_days=log_retention,
             tags=tags,
         )
 
+        if sweeper_filename:
+            sweep_policy = IamPolicy(
+                self,
+                "sweep-policy",
+                name=f"{websocket.name}-SWEEPCONNECTIONS",
+                policy=json.dumps(
+                    {
+                        "Version": "2012-10-17",
+                        "Statement": [
+                            {
+                                "Action": ["execute-api:ManageConnections"],
+                                "Resource": [
+                                    f"arn:aws:execute-api:ap-southeast-2:{account.account_id}:{websocket.id}/v1/*/@connections/*",
+                                ],
+                                "Effect": "Allow",
+                            }
+                        ],
+                    }
+                ),
+                tags=tags,
+            )
+
+            sweep_role = IamRole(
+                self,
+                "sweep-role",
+                name=f"Lambda-SweepWebsocketConn{suffix}",
+                assume_role_policy=assume.json,
+                managed_policy_arns=[
+                    conn_policy.arn,
+                    sweep_policy.arn,
+                    "arn:aws:iam::092201464628:policy/LambdaLogging",
+                    "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+                ]
+                + tracing_policies,
+                tags=tags,
+            )
+
+            sweep_func = LambdaFunction(
+                self,
+                "sweep-func",
+                filename=sweeper_filename,
+                function_name=f"SweepWebsocketConnection{suffix}",
+                source_code_hash="1",
+                role=sweep_role.arn,
+                handler=f"{sweeper_filename.split('/')[-1].split('.')[0]}.handler",
+                runtime=runtime,
+                memory_size=128,
+                timeout=60,
+                environment={
+                    "variables": {
+                        "REGION": "ap-southeast-2",
+                        "CONNECTION_TABLE_NAME": conn_table.name,
+                        "WEBSOCKET_ENDPOINT": f"https://{websocket.id}.execute-api.ap-southeast-2.amazonaws.com/v1",
+                        **tuning,
+                    }
+                },
+                tracing_config=tracing_config,
+                tags=tags,
+            )
+
+            CloudwatchLogGroup(
+                self,
+                "sweep_logs",
+                name=f"/aws/lambda/{sweep_func.function_name}",
+                retention_in_days=log_retention,
+                tags=tags,
+            )
+
+            sweep_schedule_rule = CloudwatchEventRule(
+                self,
+                "sweep-rule",
+                name=f"WebsocketSweep{suffix}",
+                schedule_expression=sweep_schedule,
+            )
+
+            CloudwatchEventTarget(
+                self, "sweep-target", rule=sweep_schedule_rule.name, arn=sweep_func.arn
+            )
+
+            LambdaPermission(
+                self,
+                "sweep-perm",
+                statement_id="AllowExecutionFromCloudWatch",
+                action="lambda:InvokeFunction",
+                function_name=sweep_func.function_name,
+                principal="events.amazonaws.com",
+                source_arn=sweep_schedule_rule.arn,
+            )
+
         TerraformOutput(self, "websocker_url", value=stage.invoke_url)
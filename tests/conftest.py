@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Lambda code imports its helpers as a top level package, as packaged
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src", "code")
+)
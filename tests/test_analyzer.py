@@ -0,0 +1,209 @@
+import json
+import os
+
+import pytest
+
+from src.analyzer import ResourceGraph, build_report, capacity, run_rules
+from src.analyzer.__main__ import main
+from src.analyzer.report import SECONDS_PER_MONTH
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURE = os.path.join(FIXTURES, "api", "cdk.tf.json")
+# cdktf.out of a DataStack and an ApiStack with a GET endpoint using its tables
+SPLIT = os.path.join(FIXTURES, "split")
+
+
+def graph_of(document, stack="api"):
+    graph = ResourceGraph()
+    graph.add_stack(stack, document)
+    return graph
+
+
+def rules_of(graph):
+    return [(f.severity, f.rule, f.resource) for f in run_rules(graph)]
+
+
+@pytest.fixture
+def document():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+
+def test_load_file():
+    graph = ResourceGraph.load(FIXTURE)
+    assert graph.stacks == ["api"]
+    assert graph.counts()["api"]["aws_lambda_function"] == 3
+
+
+def test_load_cdktf_out(document, tmp_path):
+    for stack in ("data", "api"):
+        path = tmp_path / "stacks" / stack
+        path.mkdir(parents=True)
+        (path / "cdk.tf.json").write_text(json.dumps(document))
+
+    graph = ResourceGraph.load(str(tmp_path))
+    assert graph.stacks == ["api", "data"]
+    # Same address in two stacks, references stay in their stack
+    function = graph.get("data", "aws_lambda_function.get")
+    assert [r.stack for r in graph.targets(function, "aws_iam_role")] == ["data"]
+
+
+def test_load_nothing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ResourceGraph.load(str(tmp_path))
+
+
+def test_references(document):
+    graph = graph_of(document)
+    table = graph.get("api", "aws_dynamodb_table.table")
+    api = graph.get("api", "aws_api_gateway_rest_api.api")
+
+    assert table.path == "api/data/table"
+    assert api.path == "api/aws_api_gateway_rest_api.api"
+    assert [r.name for r in graph.sources(table, "aws_iam_policy")] == ["query"]
+    assert [r.name for r in graph.sources(api, "aws_api_gateway_stage")] == ["prod"]
+    # "//" metadata is not a reference
+    assert graph.targets(table, "aws_dynamodb_table") == []
+
+
+def test_split_references():
+    graph = ResourceGraph.load(SPLIT)
+    function = graph.get("p-api", "aws_lambda_function.papi_lambdagetdata_E1B01991")
+    (role,) = graph.targets(function, "aws_iam_role")
+    policies = graph.targets(role, "aws_iam_policy")
+
+    assert graph.unresolved == []
+    assert sorted(policy.path for policy in policies) == [
+        "p-data/dynamo/table-crud",
+        "p-data/timestream/brewai_api-crud",
+    ]
+    (table,) = graph.of_type("aws_dynamodb_table")
+    assert [r.path for r in graph.sources(table, "aws_iam_policy")] == [
+        "p-data/dynamo/table-crud"
+    ]
+
+
+def test_split_rules():
+    assert rules_of(ResourceGraph.load(SPLIT)) == [
+        (
+            "warning",
+            "lambda-small-memory-timestream",
+            "p-api/api/lambda-get-data",
+        ),
+        ("info", "rest-stage-cache-off", "p-api/api/rest_stage"),
+    ]
+
+
+def test_unresolved_references():
+    # The data stack is not loaded
+    graph = ResourceGraph.load(os.path.join(SPLIT, "stacks", "p-api"))
+
+    unresolved = [f for f in rules_of(graph) if f[1] == "unresolved-reference"]
+    assert unresolved == [
+        # TABLE_NAME of the lambda and the two policies of its role
+        ("warning", "unresolved-reference", "p-api/api/lambda-get-data"),
+        ("warning", "unresolved-reference", "p-api/api/lambda-role-get-data"),
+        ("warning", "unresolved-reference", "p-api/api/lambda-role-get-data"),
+    ]
+
+
+def test_rules(document):
+    assert rules_of(graph_of(document)) == [
+        ("warning", "dynamodb-low-capacity", "api/data/table"),
+        (
+            "warning",
+            "lambda-small-memory-timestream",
+            "api/aws_lambda_function.get",
+        ),
+        ("warning", "lambda-timeout-above-api", "api/aws_lambda_function.get"),
+        (
+            "info",
+            "event-source-default-batch",
+            "api/aws_lambda_event_source_mapping.stream",
+        ),
+        (
+            "info",
+            "lambda-small-memory-hot-path",
+            "api/aws_lambda_function.consumer",
+        ),
+        ("info", "log-group-no-retention", "api/aws_cloudwatch_log_group.get"),
+        ("info", "rest-stage-cache-off", "api/aws_api_gateway_stage.prod"),
+    ]
+
+
+def test_rules_pass(document):
+    resources = document["resource"]
+    resources["aws_dynamodb_table"]["table"]["billing_mode"] = "PAY_PER_REQUEST"
+    resources["aws_lambda_function"]["get"].update(memory_size=512, timeout=29)
+    resources["aws_lambda_function"]["consumer"]["memory_size"] = 256
+    resources["aws_lambda_event_source_mapping"]["stream"][
+        "maximum_batching_window_in_seconds"
+    ] = 5
+    resources["aws_cloudwatch_log_group"]["get"]["retention_in_days"] = 30
+    resources["aws_api_gateway_stage"]["prod"]["cache_cluster_enabled"] = True
+
+    assert rules_of(graph_of(document)) == []
+
+
+def test_cold_table_is_info(document):
+    resources = document["resource"]
+    del resources["aws_lambda_event_source_mapping"]
+    del resources["aws_api_gateway_integration"]
+
+    findings = [f for f in rules_of(graph_of(document)) if f[1].startswith("dynamo")]
+    assert findings == [("info", "dynamodb-low-capacity", "api/data/table")]
+
+
+def test_default_batch_size_is_a_warning(document):
+    del document["resource"]["aws_lambda_event_source_mapping"]["stream"]["batch_size"]
+
+    findings = run_rules(graph_of(document))
+    batch = [f for f in findings if f.rule == "event-source-default-batch"]
+    assert batch[0].severity == "warning"
+    assert batch[0].message.startswith(
+        "batch_size, maximum_batching_window_in_seconds left to default"
+    )
+
+
+def test_capacity(document):
+    limits = {limit["resource"]: limit for limit in capacity(graph_of(document))}
+
+    assert limits["api/data/table"]["reads_per_month"] == SECONDS_PER_MONTH
+    assert limits["api/aws_dynamodb_table.checkpoints"] == {
+        "resource": "api/aws_dynamodb_table.checkpoints",
+        "kind": "dynamodb-on-demand",
+    }
+    stage = limits["api/aws_api_gateway_stage.prod"]
+    assert stage["requests_per_month"] == 100 * SECONDS_PER_MONTH
+    assert stage["quota"] == 100000
+    batch = limits["api/aws_lambda_function.batch"]
+    assert batch["concurrency"] == 10
+    assert batch["requests_per_month_at_timeout"] == SECONDS_PER_MONTH // 30
+    assert limits["api/aws_lambda_function.get"]["memory_size"] == 128
+
+
+def test_report(document):
+    graph = graph_of(document)
+    report = build_report(graph, run_rules(graph))
+    assert report["warnings"] == 3
+    assert report["stacks"]["api"]["aws_dynamodb_table"] == 2
+
+
+def test_main(capsys):
+    assert main([FIXTURE]) == 0
+    output = capsys.readouterr().out
+    assert "Findings (3 warnings)" in output
+    assert "  api/data/table: 3M reads, 3M writes" in output
+
+    assert main([FIXTURE, "--json", "--strict"]) == 1
+    assert json.loads(capsys.readouterr().out)["warnings"] == 3
+
+
+def test_main_strict_without_warnings(document, tmp_path):
+    document["resource"] = {
+        "aws_cloudwatch_log_group": document["resource"]["aws_cloudwatch_log_group"]
+    }
+    path = tmp_path / "cdk.tf.json"
+    path.write_text(json.dumps(document))
+
+    assert main([str(path), "--strict"]) == 0
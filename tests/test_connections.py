@@ -0,0 +1,85 @@
+import importlib
+import sys
+import time
+
+import boto3
+import pytest
+
+from helpers import connections
+from src.harness.standins import ManagementApi
+
+moto = pytest.importorskip("moto")
+
+
+@pytest.fixture
+def table(monkeypatch):
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "testing")
+    with moto.mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="ap-southeast-2")
+        yield dynamodb.create_table(
+            TableName="connections",
+            KeySchema=[{"AttributeName": "connectionId", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "connectionId", "AttributeType": "S"}
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+
+def ids(table):
+    return sorted(item["connectionId"] for item in table.scan()["Items"])
+
+
+def test_register_and_heartbeat(table):
+    connections.register(table, "a", ttl=-10)
+    assert connections.live_connections(table) == []
+
+    assert connections.heartbeat(table, "a")
+    assert connections.live_connections(table) == ["a"]
+    assert not connections.heartbeat(table, "unknown")
+    assert ids(table) == ["a"]
+
+
+def test_sweep(table):
+    connections.register(table, "live")
+    connections.register(table, "gone")
+    connections.register(table, "expired", ttl=-10)
+    table.put_item(Item={"connectionId": "no-ttl"})
+    api = ManagementApi({"live", "expired", "no-ttl"})
+
+    assert connections.sweep(api, table, page_size=1) == 2
+    assert ids(table) == ["live", "no-ttl"]
+
+
+def test_sweep_stops_at_deadline(table):
+    for i in range(4):
+        connections.register(table, f"expired-{i}", ttl=-10)
+
+    deleted = connections.sweep(
+        ManagementApi(None), table, deadline=time.monotonic(), page_size=1
+    )
+    assert deleted == 1
+    assert len(ids(table)) == 3
+
+
+def test_manager(table, monkeypatch):
+    monkeypatch.setenv("REGION", "ap-southeast-2")
+    monkeypatch.setenv("CONNECTION_TABLE_NAME", table.name)
+    sys.modules.pop("manage_conn", None)
+    manage_conn = importlib.import_module("manage_conn")
+
+    def call(route, connection_id="a"):
+        event = {"requestContext": {"routeKey": route, "connectionId": connection_id}}
+        return manage_conn.handler(event, None)["statusCode"]
+
+    assert call("$connect") == 200
+    expires = table.get_item(Key={"connectionId": "a"})["Item"]["expiresAt"]
+    assert expires > time.time()
+
+    # Heartbeat of a swept connection registers it again
+    assert call("heartbeat", "b") == 200
+    assert ids(table) == ["a", "b"]
+    assert call("$disconnect") == 200
+    assert ids(table) == ["b"]
+    assert call("other") == 400
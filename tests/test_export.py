@@ -0,0 +1,132 @@
+import datetime
+import gzip
+import importlib
+import io
+import json
+import sys
+from decimal import Decimal
+
+import boto3
+import pytest
+
+moto = pytest.importorskip("moto")
+pyarrow = pytest.importorskip("pyarrow")
+import pyarrow.parquet  # noqa: E402
+
+BUCKET = "exports"
+
+
+@pytest.fixture
+def export_analytics(monkeypatch):
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.setenv("REGION", "ap-southeast-2")
+    monkeypatch.setenv("EXPORT_BUCKET", BUCKET)
+    monkeypatch.setenv("GLUE_CRAWLER_NAME", "crawler")
+    with moto.mock_aws():
+        boto3.client("s3", region_name="ap-southeast-2").create_bucket(
+            Bucket=BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": "ap-southeast-2"},
+        )
+        sys.modules.pop("export_analytics", None)
+        module = importlib.import_module("export_analytics")
+        monkeypatch.setattr(module, "BATCH_SIZE", 2)
+        yield module
+
+
+def raw_export(module, files):
+    """Write an export of DynamoDB JSON data files, return its description."""
+    lines = []
+    for i, items in enumerate(files):
+        key = f"dynamodb-raw/t/data/{i}.json.gz"
+        body = b"".join(json.dumps({"Item": item}).encode() + b"\n" for item in items)
+        module.s3.put_object(Bucket=BUCKET, Key=key, Body=gzip.compress(body))
+        lines.append(json.dumps({"dataFileS3Key": key}))
+    module.s3.put_object(
+        Bucket=BUCKET,
+        Key="dynamodb-raw/t/manifest-files.json",
+        Body="\n".join(lines).encode(),
+    )
+    return {
+        "ExportArn": "arn:export",
+        "ExportTime": datetime.datetime(2024, 1, 2, 3),
+        "ExportManifest": "dynamodb-raw/t/manifest-summary.json",
+    }
+
+
+def parts(module):
+    listing = module.s3.list_objects_v2(
+        Bucket=BUCKET, Prefix="dynamodb/t/dt=2024-01-02/"
+    )
+    keys = sorted(o["Key"] for o in listing["Contents"])
+    tables = [
+        pyarrow.parquet.read_table(
+            io.BytesIO(module.s3.get_object(Bucket=BUCKET, Key=key)["Body"].read())
+        )
+        for key in keys
+        if key.endswith(".parquet")
+    ]
+    return [key.rsplit("/", 1)[1] for key in keys], tables
+
+
+def test_convert_keeps_numbers_exact(export_analytics):
+    export = raw_export(
+        export_analytics,
+        [
+            [
+                {"id": {"S": "a"}, "value": {"N": "0.1"}, "big": {"N": "1E+30"}},
+                {"id": {"S": "b"}, "value": {"N": "12345678901234567890.123456789"}},
+            ],
+            [
+                {
+                    "id": {"S": "c"},
+                    "nested": {"M": {"x": {"N": "0.1000000000000000001"}}},
+                }
+            ],
+        ],
+    )
+
+    assert export_analytics.convert_export(export, "t")
+    files, tables = parts(export_analytics)
+    # The nested attribute of the second batch widens the schema
+    assert files == ["_SUCCESS", "part-00000.parquet", "part-00001.parquet"]
+    first, second = tables
+    assert first.schema.field("value").type == pyarrow.decimal128(38, 9)
+    assert first.column("value").to_pylist() == [
+        Decimal("0.1"),
+        Decimal("12345678901234567890.123456789"),
+    ]
+    # 1E+30 does not fit decimal128(38, 9)
+    assert first.column("big").to_pylist() == ["1E+30", None]
+    assert first.num_rows == 2
+    assert second.column("nested").to_pylist() == ['{"x": "0.1000000000000000001"}']
+
+    schema = json.load(
+        export_analytics.s3.get_object(Bucket=BUCKET, Key="schemas/dynamodb/t.json")[
+            "Body"
+        ]
+    )
+    assert schema["big"] == ["N+"]
+    # Converted once
+    assert not export_analytics.convert_export(export, "t")
+
+
+def test_plain_numbers(export_analytics):
+    plain = export_analytics._plain
+    assert plain({"a": Decimal("2"), "b": [Decimal("0.5"), Decimal("0.1")]}) == {
+        "a": 2,
+        "b": [0.5, 0.1],
+    }
+    assert plain(Decimal("3.14159265358979323846")) == "3.14159265358979323846"
+
+
+def test_skip_expired_export(export_analytics, caplog):
+    export = raw_export(export_analytics, [[{"id": {"S": "a"}}], [{"id": {"S": "b"}}]])
+    export_analytics.s3.delete_object(
+        Bucket=BUCKET, Key="dynamodb-raw/t/data/1.json.gz"
+    )
+
+    assert not export_analytics.convert_export(export, "t")
+    listing = export_analytics.s3.list_objects_v2(Bucket=BUCKET, Prefix="dynamodb/")
+    assert listing["KeyCount"] == 0
+    assert "Skipped export arn:export, its raw files expired" in caplog.text
@@ -0,0 +1,31 @@
+import pytest
+
+from batch_plan import plan_windows
+from src.predictions.batch import EXPRESS_LIMIT, worker_retries
+
+
+def test_plan_windows():
+    assert plan_windows(["A0", "A1"], 0, 150, step=60, window=100) == [
+        {"device": "A0", "start": 0, "end": 100, "step": 60},
+        {"device": "A0", "start": 100, "end": 150, "step": 60},
+        {"device": "A1", "start": 0, "end": 100, "step": 60},
+        {"device": "A1", "start": 100, "end": 150, "step": 60},
+    ]
+
+
+@pytest.mark.parametrize("step, window", [(0, 3600), (60, 0), (-60, 3600)])
+def test_plan_windows_rejects_non_positive(step, window):
+    with pytest.raises(ValueError):
+        plan_windows(["A0"], 0, 7200, step=step, window=window)
+
+
+@pytest.mark.parametrize("timeout, retries", [(60, 3), (90, 2), (120, 1), (200, 0)])
+def test_worker_retries_fit_in_express(timeout, retries):
+    assert worker_retries(timeout) == retries
+    # Every attempt lasting the whole timeout, plus the backoff
+    assert (retries + 1) * timeout + 5 * (2**retries - 1) + 7 <= EXPRESS_LIMIT
+
+
+def test_worker_timeout_above_express():
+    with pytest.raises(ValueError):
+        worker_retries(EXPRESS_LIMIT)
@@ -0,0 +1,76 @@
+import boto3
+import pytest
+
+from helpers.reads import CursorError, batch_get, query_devices, query_page
+
+moto = pytest.importorskip("moto")
+
+
+@pytest.fixture
+def table(monkeypatch):
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "testing")
+    with moto.mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="ap-southeast-2")
+        table = dynamodb.create_table(
+            TableName="data",
+            KeySchema=[
+                {"AttributeName": "DeviceID", "KeyType": "HASH"},
+                {"AttributeName": "Timestamp", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "DeviceID", "AttributeType": "S"},
+                {"AttributeName": "Timestamp", "AttributeType": "N"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        with table.batch_writer() as batch:
+            for timestamp in range(5):
+                batch.put_item(Item={"DeviceID": "A", "Timestamp": timestamp})
+            batch.put_item(Item={"DeviceID": "B", "Timestamp": 0})
+        yield table
+
+
+def test_query_page(table):
+    items, cursor = query_page(table, "A", 1, 4, limit=3)
+    assert [item["Timestamp"] for item in items] == [1, 2, 3]
+
+    items, cursor = query_page(table, "A", 1, 4, limit=3, cursor=cursor)
+    assert [item["Timestamp"] for item in items] == [4]
+    assert cursor is None
+
+    with pytest.raises(CursorError):
+        query_page(table, "B", 1, 4, cursor=query_page(table, "A", 0, 4, 1)[1])
+
+
+def test_query_devices_until_done(table):
+    pages = []
+    cursor = None
+    while True:
+        items, cursor = query_devices(table, ["A", "B"], 0, 10, limit=2, cursor=cursor)
+        pages.append({d: [i["Timestamp"] for i in items[d]] for d in items})
+        if cursor is None:
+            break
+
+    # B is done after its first page and no longer queried
+    assert pages == [{"A": [0, 1], "B": [0]}, {"A": [2, 3]}, {"A": [4]}]
+
+
+def test_query_devices_cursor_of_other_devices(table):
+    _, cursor = query_devices(table, ["A", "B"], 0, 10, limit=1)
+
+    # A client dropping a device does not restart it
+    with pytest.raises(CursorError):
+        query_devices(table, ["A"], 0, 10, limit=1, cursor=cursor)
+    with pytest.raises(CursorError):
+        query_devices(table, ["A", "B", "C"], 0, 10, limit=1, cursor=cursor)
+    with pytest.raises(CursorError):
+        query_devices(table, ["A", "B"], 0, 10, cursor="not a cursor")
+
+
+def test_batch_get(table):
+    items = batch_get(table, [("A", 1), ("B", 0), ("C", 1)])
+    assert sorted((i["DeviceID"], i["Timestamp"]) for i in items) == [
+        ("A", 1),
+        ("B", 0),
+    ]
@@ -0,0 +1,54 @@
+import base64
+import json
+from decimal import Decimal
+
+import pytest
+
+from helpers.responses import ARROW, encode_response
+
+ITEMS = [
+    {"DeviceID": "A0", "Timestamp": Decimal(1670536702), "co2": Decimal("412.5")},
+    {"DeviceID": "A1", "Timestamp": Decimal(1670536762)},
+]
+
+
+def event(**headers):
+    return {"headers": headers, "queryStringParameters": None}
+
+
+def test_json_without_binary_accept():
+    # Compression is left to API Gateway, even for big bodies
+    items = ITEMS * 50000
+    response = encode_response(
+        event(Accept="application/json", **{"Accept-Encoding": "gzip, deflate"}),
+        items,
+    )
+
+    assert "isBase64Encoded" not in response
+    assert "Content-Encoding" not in response["headers"]
+    assert response["headers"]["Content-Type"] == "application/json"
+    body = json.loads(response["body"])
+    assert len(body) == len(items)
+    assert body[0] == {"DeviceID": "A0", "Timestamp": 1670536702, "co2": 412.5}
+
+
+def test_columnar_json():
+    response = encode_response(
+        {"headers": {"accept": "application/json; format=columnar"}}, ITEMS
+    )
+    assert json.loads(response["body"]) == {
+        "DeviceID": ["A0", "A1"],
+        "Timestamp": [1670536702, 1670536762],
+        "co2": [412.5, None],
+    }
+
+
+def test_arrow_with_binary_accept():
+    pyarrow = pytest.importorskip("pyarrow")
+    response = encode_response(event(Accept=ARROW), ITEMS)
+
+    assert response["isBase64Encoded"]
+    assert response["headers"]["Content-Type"] == ARROW
+    body = base64.b64decode(response["body"])
+    table = pyarrow.ipc.open_stream(body).read_all()
+    assert table.column("DeviceID").to_pylist() == ["A0", "A1"]
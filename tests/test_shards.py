@@ -0,0 +1,42 @@
+import pytest
+
+from helpers import shards
+
+
+class Throttled:
+    """batch_get_item leaving every key unprocessed `throttled` times."""
+
+    def __init__(self, throttled):
+        self.throttled = throttled
+
+    def batch_get_item(self, RequestItems):
+        (keys,) = RequestItems.values()
+        if self.throttled:
+            self.throttled -= 1
+            return {"Responses": {}, "UnprocessedKeys": RequestItems}
+        items = [{"DeviceID": k["DeviceID"], "LastTimestamp": 7} for k in keys["Keys"]]
+        return {"Responses": {"checkpoints": items}}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(shards.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def checkpoints(throttled):
+    checkpoints = shards.Checkpoints("checkpoints", "ap-southeast-2")
+    checkpoints.dynamodb = Throttled(throttled)
+    return checkpoints
+
+
+def test_load_backs_off_on_unprocessed_keys(sleeps):
+    assert checkpoints(6).load(["A0", "A1"], retries=6) == {"A0": 7, "A1": 7}
+    assert sleeps == [0.05, 0.1, 0.2, 0.4, 0.8, 1]
+
+
+def test_load_gives_up(sleeps):
+    with pytest.raises(RuntimeError, match="2 keys unprocessed"):
+        checkpoints(3).load(["A0", "A1"], retries=2)
+    assert len(sleeps) == 2
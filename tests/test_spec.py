@@ -0,0 +1,186 @@
+import copy
+import json
+
+import pytest
+
+from src.config import SpecError, load_spec, validate_spec
+
+SPEC = {
+    "project": "brewai",
+    "env": "dev",
+    "owner": "me",
+    "stacks": {
+        "data": {
+            "timestream": {"tables": [{"name": "brewai_api"}]},
+            "dynamodb": {"stream": False},
+        },
+        "fetch": {
+            "scheduled": [
+                {
+                    "name": "brewai-fetch",
+                    "schedule": "rate(1 minute)",
+                    "filename": "src/code/archived/brewai_fetch.zip",
+                    "policies": ["@timestream.brewai_api.crud_arn"],
+                    "memory_size": 256,
+                    "timeout": 50,
+                    "environement": {
+                        "DATABASE_NAME": "@timestream.db_name",
+                        "TABLE_NAME": "@timestream.brewai_api.table_name",
+                    },
+                    "shards": 4,
+                    "checkpoint": True,
+                }
+            ],
+        },
+        "api": {
+            "rest": {
+                "endpoint_name": "brewai",
+                "endpoints": [
+                    {
+                        "http": "GET",
+                        "filename": "src/code/archived/table_get.zip",
+                        "policies": ["@dynamodb.crud_arn"],
+                        "environement": {"TABLE_NAME": "@dynamodb.table_name"},
+                    }
+                ],
+            }
+        },
+    },
+}
+
+
+def errors_of(spec):
+    with pytest.raises(SpecError) as error:
+        validate_spec(spec)
+    return error.value.errors
+
+
+@pytest.fixture
+def spec():
+    return copy.deepcopy(SPEC)
+
+
+def test_valid_spec(spec):
+    validate_spec(spec)
+
+
+def test_load_json_spec(spec, tmp_path):
+    path = tmp_path / "stack.json"
+    path.write_text(json.dumps(spec))
+    assert load_spec(str(path)) == spec
+
+
+def test_missing_project_fields():
+    assert errors_of({"stacks": {}}) == [
+        "spec: missing field 'project'",
+        "spec: missing field 'env'",
+        "spec: missing field 'owner'",
+    ]
+
+
+def test_field_errors_then_value_errors(spec):
+    function = spec["stacks"]["fetch"]["scheduled"][0]
+    function["memory_size"] = "256"
+    function["shards"] = 0
+    function["runtime"] = "python2.7"
+    function["log_retention"] = 2
+    function["colour"] = "blue"
+
+    assert errors_of(spec) == [
+        "stacks.fetch.scheduled[0]: unknown field 'colour'",
+        "stacks.fetch.scheduled[0].memory_size: expected int",
+    ]
+
+    function["memory_size"] = 256
+    del function["colour"]
+    assert errors_of(spec) == [
+        "stacks.fetch.scheduled[0].shards: must be at least 1",
+        "stacks.fetch.scheduled[0].log_retention: not a CloudWatch retention",
+        "stacks.fetch.scheduled[0].runtime: must be one of python3.9, python3.10, "
+        "python3.11, python3.12, python3.13",
+    ]
+
+
+def test_bool_is_not_an_int(spec):
+    spec["stacks"]["fetch"]["scheduled"][0]["timeout"] = True
+    assert errors_of(spec) == ["stacks.fetch.scheduled[0].timeout: expected int"]
+
+
+def test_endpoint_errors(spec):
+    endpoints = spec["stacks"]["api"]["rest"]["endpoints"]
+    endpoints[0]["warm_concurrency"] = 51
+    endpoints.append(dict(endpoints[0], http="get", resource="other", timeout=31))
+    endpoints.append(dict(endpoints[0], warm_concurrency=0))
+
+    assert errors_of(spec) == [
+        "stacks.api.rest.endpoints[0].warm_concurrency: must be between 0 and 50",
+        "stacks.api.rest.endpoints[1].resource: must be one of data, pred, sensor",
+        "stacks.api.rest.endpoints[1].timeout: must be between 1 and 30",
+        "stacks.api.rest.endpoints[1].warm_concurrency: must be between 0 and 50",
+        "stacks.api.rest.endpoints[2]: duplicate GET on 'data'",
+    ]
+
+
+def test_reference_to_a_later_stack(spec):
+    stacks = spec["stacks"]
+    spec["stacks"] = {"api": stacks["api"], "data": stacks["data"]}
+
+    assert errors_of(spec) == [
+        "stacks.api.rest.endpoints[0].policies: unknown reference '@dynamodb.crud_arn'",
+        "stacks.api.rest.endpoints[0].environement: "
+        "unknown reference '@dynamodb.table_name'",
+    ]
+
+
+def test_reference_to_a_later_section(spec):
+    # Sections of a stack are built in order, rest after dynamodb
+    spec["stacks"] = {"all": {**SPEC["stacks"]["data"], **SPEC["stacks"]["api"]}}
+    validate_spec(spec)
+
+
+def test_unknown_reference(spec):
+    function = spec["stacks"]["fetch"]["scheduled"][0]
+    function["environement"]["OTHER"] = "@timestream.other.table_name"
+    function["policies"].append("not-an-arn")
+
+    assert errors_of(spec) == [
+        "stacks.fetch.scheduled[0].policies: 'not-an-arn' is not an arn or ref",
+        "stacks.fetch.scheduled[0].environement: "
+        "unknown reference '@timestream.other.table_name'",
+    ]
+
+
+def test_checkpoint_reference(spec):
+    spec["stacks"]["api"]["rest"]["endpoints"][0]["environement"][
+        "CHECKPOINTS"
+    ] = "@scheduled.brewai-fetch.checkpoint_table_name"
+    validate_spec(spec)
+
+    spec["stacks"]["fetch"]["scheduled"][0]["checkpoint"] = False
+    assert errors_of(spec) == [
+        "stacks.api.rest.endpoints[0].environement: "
+        "unknown reference '@scheduled.brewai-fetch.checkpoint_table_name'"
+    ]
+
+
+def test_singleton_sections(spec):
+    spec["stacks"]["more"] = {"dynamodb": {}}
+    assert errors_of(spec) == ["stacks.more.dynamodb: already defined in stacks.data"]
+
+
+def test_websocket_needs_a_detached_stream(spec):
+    spec["stacks"]["stream"] = {"websocket": {}}
+    assert errors_of(spec) == [
+        "stacks.stream.websocket: needs a previous dynamodb with stream: true "
+        "and websocket: false"
+    ]
+
+    spec["stacks"]["data"]["dynamodb"] = {"stream": True, "websocket": False}
+    validate_spec(spec)
+
+
+def test_rest_needs_an_endpoint(spec):
+    spec["stacks"]["api"]["rest"]["endpoints"] = []
+    assert errors_of(spec) == [
+        "stacks.api.rest.endpoints: at least one endpoint is required"
+    ]
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from src.harness.standins import StandIns, TimestreamWrite
+
+boto3 = pytest.importorskip("boto3")
+
+
+def test_active_restores_the_environment(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "real")
+    monkeypatch.delenv("AWS_SECRET_ACCESS_KEY", raising=False)
+    monkeypatch.delenv("REGION", raising=False)
+    client = boto3.session.Session.client
+
+    with StandIns().active():
+        assert os.environ["AWS_ACCESS_KEY_ID"] != "real"
+        assert os.environ["REGION"] == "ap-southeast-2"
+        assert isinstance(boto3.client("timestream-write"), TimestreamWrite)
+        os.environ["TABLE_NAME"] = "set-by-a-handler"
+
+    assert os.environ["AWS_ACCESS_KEY_ID"] == "real"
+    assert "AWS_SECRET_ACCESS_KEY" not in os.environ
+    assert "REGION" not in os.environ
+    assert "TABLE_NAME" not in os.environ
+    assert boto3.session.Session.client is client
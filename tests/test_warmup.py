@@ -0,0 +1,22 @@
+from helpers import warmup
+
+
+class Context:
+    invoked_function_arn = "arn:aws:lambda:ap-southeast-2:1:function:f"
+
+
+def test_copy_holds_its_container(monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_DELAY", 0)
+    event = {"warmer": True, "concurrency": 3, "invocation": 1}
+
+    assert warmup.handle(event)["container"] == warmup.CONTAINER
+
+
+def test_fan_out_counts_distinct_containers(monkeypatch):
+    # Two copies answered by the same other container
+    monkeypatch.setattr(warmup, "_fan_out", lambda context, concurrency: (1, {"other"}))
+
+    result = warmup.handle({"warmer": True, "concurrency": 3}, Context())
+    assert result["containers"] == 3
+    assert result["distinct_containers"] == 2
+    assert not warmup.is_warmup({"path": "/"})